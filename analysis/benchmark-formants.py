@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+import os, sys, glob, time, argparse, numpy as np, pandas as pd
+import parselmouth as pm
+from functions import *
+from exemplars import add_vowel
+from vowel_task.formants import lpc_formants
+from vowel_task.stream import one_per_stem
+
+# ------------------------
+# Config
+# ------------------------
+INPUT_ROOT = "../exemplars"               # where subj_*/ live
+OUTPUT_CSV = "formant-benchmark.csv"      # --out: one row per file
+
+# Praat settings, as extract-formants.py
+MAX_FORMANT_HZ = 5500
+NFORMANTS      = 5.0
+WINLEN_S       = 0.025
+PREEMPH_HZ     = 50
+
+
+def measure(path, repeat=3, max_bw_hz=None):
+    """Midpoint F1/F2 from Praat's Burg analysis and from the task's LPC estimator, with the best-of-repeat time of each."""
+    snd = pm.Sound(path)
+    x = snd.values[0]
+    sr = int(snd.sampling_frequency)
+    tc = snd.get_total_duration() / 2
+
+    praat_s = lpc_s = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        formants = snd.to_formant_burg(None, NFORMANTS, MAX_FORMANT_HZ, WINLEN_S, PREEMPH_HZ)
+        praat = formants.get_value_at_time(1, tc), formants.get_value_at_time(2, tc)
+        praat_s = min(praat_s, time.perf_counter() - t)
+
+        t = time.perf_counter()
+        lpc = lpc_formants(x, sr, center=int(round(tc * sr)), win_s=WINLEN_S, max_formant_hz=MAX_FORMANT_HZ,
+                           n_formants=int(NFORMANTS), preemph_hz=PREEMPH_HZ, max_bw_hz=max_bw_hz)
+        lpc_s = min(lpc_s, time.perf_counter() - t)
+
+    return file_row(path, {
+        "F1_praat": praat[0], "F2_praat": praat[1],
+        "F1_lpc": lpc[0], "F2_lpc": lpc[1],
+        "praat_ms": praat_s * 1000, "lpc_ms": lpc_s * 1000,
+    })
+
+
+def summarize(df):
+    """Median absolute difference and correlation of F1/F2, and median time per file, overall and per vowel."""
+    rows = []
+    for vowel, g in [("all", df)] + list(df.groupby("vowel", observed=True)):
+        row = {"vowel": vowel, "n": len(g)}
+        for f in ("F1", "F2"):
+            d = (g[f"{f}_lpc"] - g[f"{f}_praat"]).abs()
+            row[f"{f}_mad_Hz"] = d.median()
+            row[f"{f}_p90_Hz"] = d.quantile(0.9)
+            row[f"{f}_r"] = g[f"{f}_lpc"].corr(g[f"{f}_praat"])
+        row["praat_ms"] = g["praat_ms"].median()
+        row["lpc_ms"] = g["lpc_ms"].median()
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+# ------------------------
+# Main
+# ------------------------
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Compare the task's live LPC formants with Praat on the exemplar corpus.")
+    parser.add_argument("root", nargs="?", default=INPUT_ROOT, help="corpus root with subj_*/ (default %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per file, best kept (default %(default)s)")
+    parser.add_argument("--max-bw", type=float, default=None,
+                        help="skip poles broader than this in the estimator (Praat keeps them; e.g. 600 Hz "
+                             "drops the broad pole Praat reports as F2 in some /i/ tokens)")
+    parser.add_argument("--out", nargs="?", const=OUTPUT_CSV, help=f"also write per-file results (default {OUTPUT_CSV})")
+    args = parser.parse_args()
+
+    files = one_per_stem(p for p in glob.glob(os.path.join(args.root, "subj_*", "*", "*.*"))
+                         if os.path.splitext(p)[1].lower() in (".wav", ".flac"))     # once if kept as both
+    if not files:
+        sys.exit(f"No WAV/FLAC files found under {args.root}/subj_*/<language>/")
+
+    df = add_vowel(pd.DataFrame([measure(p, args.repeat, args.max_bw) for p in files]))
+    missing = df[["F1_praat", "F2_praat", "F1_lpc", "F2_lpc"]].isna().any(axis=1)
+    if missing.any():
+        print(f"{int(missing.sum())} file(s) without F1/F2 from one of the two, left out of the summary")
+    if args.out:
+        df.to_csv(args.out, index=False)
+
+    with pd.option_context("display.width", 120, "display.float_format", "{:.2f}".format):
+        print(summarize(df[~missing]).to_string(index=False))
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+import os, sys, argparse
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from functions import *                   # puts ../task on sys.path
+from vowel_task.stream import transcode
+
+# ------------------------
+# Config
+# ------------------------
+ROOTS = ["../data", "../exemplars"]      # trees with subj_*/<language>/
+EXTS  = {"flac": ".flac", "wav": ".wav"}
+
+
+def find_audio(roots, ext):
+    """Every file with extension ext under root/subj_*/<language>/, for each root (recursing below that)."""
+    paths = []
+    for root in roots:
+        for dirpath, _, files in os.walk(root):
+            rel = os.path.relpath(dirpath, root).split(os.sep)
+            if rel[0].startswith("subj_") and len(rel) >= 2:
+                paths += [os.path.join(dirpath, f) for f in sorted(files) if f.lower().endswith(ext)]
+    return sorted(paths)
+
+
+def convert(src, ext, delete=False):
+    """src next to itself with extension ext (verified sample for sample); returns (src, dst, status, bytes in, bytes out, error)."""
+    dst = os.path.splitext(src)[0] + ext
+    try:
+        if os.path.exists(dst):
+            return src, dst, "skipped", os.path.getsize(src), os.path.getsize(dst), ""
+        size_in, size_out = transcode(src, dst)
+        if delete:
+            os.remove(src)
+        return src, dst, "converted", size_in, size_out, ""
+    except Exception as err:
+        return src, dst, "failed", "", "", f"{type(err).__name__}: {err}"
+
+
+# ------------------------
+# Main
+# ------------------------
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Convert 16-bit takes and session streams between WAV and FLAC, losslessly.")
+    parser.add_argument("roots", nargs="*", default=ROOTS, help="trees with subj_*/ (default: %(default)s)")
+    parser.add_argument("--to", choices=sorted(EXTS), default="flac", help="target codec (default %(default)s)")
+    parser.add_argument("--jobs", type=int, default=0, help="worker processes (default 0 = all cores)")
+    parser.add_argument("--delete", action="store_true", help="remove each original once its conversion is verified")
+    parser.add_argument("--report", help="also write one row per file to this CSV")
+    args = parser.parse_args()
+
+    ext = EXTS[args.to]
+    source_ext = EXTS["wav" if args.to == "flac" else "flac"]
+    sources = find_audio([r for r in args.roots if os.path.isdir(r)], source_ext)
+    if not sources:
+        sys.exit(f"No {source_ext} files under {', '.join(args.roots)}")
+
+    jobs = args.jobs or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(convert, sources, [ext] * len(sources), [args.delete] * len(sources),
+                                chunksize=max(1, len(sources) // (jobs * 4))))
+
+    df = pd.DataFrame(results, columns=["source", "dest", "status", "bytes_in", "bytes_out", "error"])
+    if args.report:
+        df.to_csv(args.report, index=False)
+    done = df[df["status"] != "failed"]
+    size_in, size_out = done["bytes_in"].astype(float).sum(), done["bytes_out"].astype(float).sum()
+    print(f"{len(df)} files: {df['status'].value_counts().to_dict()}; "
+          f"{size_in / 2**20:.1f} MiB -> {size_out / 2**20:.1f} MiB ({size_out / max(size_in, 1):.0%})")
+    for rec in df[df["status"] == "failed"].itertuples():
+        print(f"Failed: {rec.source}: {rec.error}", file=sys.stderr)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+import re, sys, argparse
+import numpy as np
+import pandas as pd
+from functions import read_formant_table
+
+CHI2_80 = 3.22          # chi-square (2 dof) cutoff for the central 80%
+VOWEL_RE = re.compile(r'(aa|ii|uu|a|i|u)')
+
+
+def extract_vowel(word):
+    m = VOWEL_RE.search(word)
+    return m.group(0) if m else None
+
+
+def add_vowel(df):
+    """Fill 'vowel' from the filename field where present, otherwise from the word."""
+    out = df.copy()
+    derived = out['word'].astype(str).str.extract(VOWEL_RE, expand=False)
+    out['vowel'] = out['vowel'].astype(object).fillna(derived) if 'vowel' in out else derived
+    return out
+
+
+def lobanov(df, cols=('F1_Hz', 'F2_Hz'), by='subject'):
+    """Per-speaker z-scores (population std), added as F1_z, F2_z, ..."""
+    out = df.copy()
+    g = out.groupby(by, observed=True)[list(cols)]
+    z = (out[list(cols)] - g.transform('mean')) / g.transform('std', ddof=0)
+    for c in cols:
+        out[c.replace('_Hz', '_z')] = z[c]
+    return out
+
+
+def group_moments(X, codes, n_groups):
+    """Counts, means and sample covariances of the rows of X per group code, as stacked arrays."""
+    d = X.shape[1]
+    n = np.bincount(codes, minlength=n_groups).astype(float)
+    sx = np.zeros((n_groups, d))
+    sxx = np.zeros((n_groups, d, d))
+    np.add.at(sx, codes, X)
+    np.add.at(sxx, codes, X[:, :, None] * X[:, None, :])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mu = sx / n[:, None]
+        cov = (sxx - n[:, None, None] * mu[:, :, None] * mu[:, None, :]) / (n - 1)[:, None, None]
+    return n, mu, cov
+
+
+def add_maha2(df, group_col='vowel', xcols=('F1_z', 'F2_z'), ridge=1e-6, min_n=5):
+    """
+    Adds squared Mahalanobis distance 'maha2' to df, from each group's own mean/covariance
+    (groups with fewer than min_n complete rows get NaN). All groups are solved at once: one
+    batched Cholesky factorisation of the stacked covariances, one batched triangular solve.
+    """
+    out = df.copy()
+    out['maha2'] = np.nan
+    X = out.loc[:, list(xcols)].to_numpy(float)
+    ok = np.isfinite(X).all(axis=1) & out[group_col].notna().to_numpy()
+    if not ok.any():
+        return out
+    codes, groups = pd.factorize(out.loc[ok, group_col])
+    X = X[ok]
+
+    n, mu, cov = group_moments(X, codes, len(groups))
+    usable = n >= min_n
+    cov[~usable] = np.eye(len(xcols))
+    L = np.linalg.cholesky(cov + ridge * np.eye(len(xcols)))
+    y = np.linalg.solve(L[codes], (X - mu[codes])[:, :, None])[:, :, 0]
+    maha2 = np.einsum('ij,ij->i', y, y)
+    maha2[~usable[codes]] = np.nan
+
+    out.loc[out.index[ok], 'maha2'] = maha2
+    return out
+
+
+def select_best(df, k=5, cutoff=CHI2_80, by=('subject', 'vowel')):
+    """The k most central tokens (smallest maha2, at most cutoff) per subject and vowel."""
+    central = df[df['maha2'] <= cutoff].sort_values('maha2', kind='stable')
+    rank = central.groupby(list(by), observed=True).cumcount()
+    return central[rank < k]
+
+
+def identify_best_exemplars(df, language='arabic', k=5, cutoff=CHI2_80, drop=()):
+    """Whole selection: vowel labels, Lobanov normalisation, Mahalanobis distance, top-k per subject/vowel."""
+    df = df[df['language'].astype(str) == language]
+    df = add_maha2(lobanov(add_vowel(df)))
+    best = select_best(df, k=k, cutoff=cutoff)
+    return best[~best['subject'].astype(str).isin([str(s) for s in drop])]
+
+
+def formant_targets(best, cols=('F1_Hz', 'F2_Hz')):
+    """Per-vowel mean and sample SD of the selected exemplars in Hz: the live task's formant targets."""
+    g = best.groupby('vowel', observed=True)[list(cols)].agg(['mean', 'std'])
+    g.columns = [f"{c.split('_')[0]}_{'sd' if s == 'std' else s}" for c, s in g.columns]
+    return g.reset_index()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Select the most central exemplar tokens per subject and vowel.")
+    parser.add_argument("input", nargs="?", default="exemplar-formants-2.csv",
+                        help="formant table from extract-formants.py (csv/parquet/feather, default %(default)s)")
+    parser.add_argument("--language", default="arabic")
+    parser.add_argument("-k", type=int, default=5, help="tokens per subject and vowel (default %(default)s)")
+    parser.add_argument("--cutoff", type=float, default=CHI2_80, help="max maha2 (default %(default)s)")
+    parser.add_argument("--drop", default="", help="comma-separated subjects to leave out")
+    parser.add_argument("--out", default="best-exemplars.csv", help="selected rows (default %(default)s)")
+    parser.add_argument("--paths", default="best-exemplar-paths.txt",
+                        help="one path per line, as the notebook wrote (default %(default)s)")
+    parser.add_argument("--targets", metavar="PATH",
+                        help="also write per-vowel F1/F2 targets for the task's live formant check")
+    args = parser.parse_args()
+
+    drop = [s for s in args.drop.split(",") if s]
+    best = identify_best_exemplars(read_formant_table(args.input), args.language, args.k, args.cutoff, drop)
+    best.to_csv(args.out, index=False)
+    best['path'].to_csv(args.paths, index=False, header=False)
+    if args.targets:
+        formant_targets(best).to_csv(args.targets, index=False)
+    print(f"Selected {len(best)} exemplars "
+          f"({best['subject'].nunique()} subjects, {best['vowel'].nunique()} vowels) -> {args.out}")
+    if best.empty:
+        sys.exit(1)
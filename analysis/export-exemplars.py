@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+import os, sys, csv, errno, shutil, argparse
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from feature_cache import file_hash
+
+# ------------------------
+# Config
+# ------------------------
+SELECTION  = "best-exemplars.csv"        # from exemplars.py (or a one-path-per-line .txt)
+OUTPUT_DIR = "../exemplars/clean"
+MANIFEST   = "export-manifest.csv"       # written inside OUTPUT_DIR
+
+FICLONE = 0x40049409                     # Linux ioctl for copy-on-write clones (btrfs, xfs, ...)
+
+
+def read_selection(path):
+    if path.endswith(".txt"):
+        with open(path, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+    return pd.read_csv(path)["path"].tolist()
+
+
+def dest_for(src, out_dir):
+    """Keep subj_<ID>/<language>/ so takes with the same file name can't overwrite each other."""
+    lang_dir = os.path.dirname(os.path.abspath(src))
+    subj_dir = os.path.dirname(lang_dir)
+    return os.path.join(out_dir, os.path.basename(subj_dir), os.path.basename(lang_dir), os.path.basename(src))
+
+
+def reflink(src, dst):
+    import fcntl
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        try:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        except OSError:
+            d.close()
+            os.remove(dst)
+            raise
+
+
+def materialize(src, dst, mode="auto"):
+    """
+    Put src at dst: hardlink, else reflink, else copy (mode 'auto'), or only the given method.
+    Skips files already there with the same size and content. Returns (method, size).
+    """
+    size = os.path.getsize(src)
+    if os.path.exists(dst):
+        if os.path.samefile(src, dst):
+            return "skipped", size
+        if os.path.getsize(dst) == size and file_hash(dst) == file_hash(src):
+            return "skipped", size
+        os.remove(dst)
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+
+    methods = ["link", "reflink", "copy"] if mode == "auto" else [mode]
+    for method in methods:
+        try:
+            if method == "link":
+                os.link(src, dst)
+            elif method == "reflink":
+                reflink(src, dst)
+            else:
+                shutil.copyfile(src, dst)
+            return method, size
+        except (OSError, ImportError) as err:
+            if method == methods[-1] or (isinstance(err, OSError) and err.errno == errno.ENOENT):
+                raise
+
+
+# ------------------------
+# Main
+# ------------------------
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Export the selected exemplar files into one directory tree.")
+    parser.add_argument("selection", nargs="?", default=SELECTION,
+                        help="selection table with a 'path' column, or a .txt of paths (default %(default)s)")
+    parser.add_argument("--out", default=OUTPUT_DIR, help="destination directory (default %(default)s)")
+    parser.add_argument("--mode", choices=["auto", "link", "reflink", "copy"], default="auto",
+                        help="hardlink, reflink or copy; auto tries them in that order (default %(default)s)")
+    parser.add_argument("--threads", type=int, default=16, help="parallel file operations (default %(default)s)")
+    args = parser.parse_args()
+
+    sources = read_selection(args.selection)
+    dests = [dest_for(p, args.out) for p in sources]
+    dupes = len(dests) - len(set(dests))
+    if dupes:
+        sys.exit(f"{dupes} selected file(s) map to the same destination; check the selection for duplicates")
+
+    def export(pair):
+        src, dst = pair
+        try:
+            method, size = materialize(src, dst, args.mode)
+            return src, dst, method, size, file_hash(dst), ""
+        except Exception as err:
+            return src, dst, "failed", "", "", f"{type(err).__name__}: {err}"
+
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(export, zip(sources, dests)))
+
+    os.makedirs(args.out, exist_ok=True)
+    with open(os.path.join(args.out, MANIFEST), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["source", "dest", "method", "size", "sha1", "error"])
+        writer.writerows(results)
+
+    counts = pd.Series([r[2] for r in results]).value_counts().to_dict()
+    print(f"Exported {len(results)} files to {args.out}: {counts}")
+    for src, _, method, _, _, err in results:
+        if method == "failed":
+            print(f"Failed: {src}: {err}", file=sys.stderr)
@@ -1,16 +1,21 @@
 #!/usr/bin/env python3
 
-import sys, math, glob, os, numpy as np, pandas as pd
-import parselmouth as pm
-from parselmouth.praat import call
+import sys, os, argparse
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
 from functions import *
+from feature_cache import FeatureCache
+from manifest import Manifest
 
 # ------------------------
 # Config
 # ------------------------
 INPUT_ROOT = "../exemplars"               # where subj_*/ live
-GLOB_PAT   = "subj_*/*/*.wav"        # adjust depth as needed
+MANIFEST_DB = "corpus-manifest.sqlite"    # index of INPUT_ROOT, rescanned incrementally
 OUTPUT_CSV = "exemplar-formants-2.csv"
+TRAJECTORY_CSV = "exemplar-trajectories.csv"   # --trajectory output (long format, one row per time point)
+CACHE_DB   = os.path.splitext(OUTPUT_CSV)[0] + "-cache.sqlite"   # per-file feature cache
+CACHE_MAX_MB = 512
 
 # Praat settings
 MAX_FORMANT_HZ = 5500       # ~5000 male-only, 5500–6000 female/mixed
@@ -18,51 +23,143 @@ NFORMANTS      = 5.0
 WINLEN_S       = 0.025
 PREEMPH_HZ     = 50
 
+# Broad-range pitch track used to estimate the pitch floor/ceiling
+F0_PARAMS = dict(time_step=0.01, init_floor=50.0, init_ceiling=600.0, voicing_threshold=None)
+PITCH_GROUP_BY = ("subject", "language")     # one floor/ceiling per speaker and language
+
 # ------------------------
 # Main
 # ------------------------
 if __name__ == "__main__":
 
-    pattern = os.path.join(INPUT_ROOT, GLOB_PAT)
-    files = sorted(glob.glob(pattern, recursive=True))
-    params = estimate_pitch_range(files)
-    floor = params['floor']
-    ceiling = params['ceiling']
-
-    rows = []
-    for path in files:
-        meta = parse_filename(path)
-        snd = pm.Sound(path)
-
-        formants = snd.to_formant_burg(None, NFORMANTS, MAX_FORMANT_HZ, WINLEN_S, PREEMPH_HZ)
-        pitch = snd.to_pitch(pitch_floor = floor, pitch_ceiling = ceiling)
-        dur = snd.get_total_duration()
-        tc = dur/2
-
-        F0 = pitch.get_value_at_time(tc)
-        F1 = formants.get_value_at_time(1, tc)
-        F2 = formants.get_value_at_time(2, tc)
-        F3 = formants.get_value_at_time(3, tc)
-
-        row = {
-            **meta,
-            "file": os.path.basename(path),
-            "path": os.path.abspath(path),
-            "duration_s": dur,
-            "t_center_s": tc,
-            "F0_Hz": float("nan") if math.isnan(F0) else float(F0),
-            "F1_Hz": float("nan") if math.isnan(F1) else float(F1),
-            "F2_Hz": float("nan") if math.isnan(F2) else float(F2),
-            "F3_Hz": float("nan") if math.isnan(F3) else float(F3),
-        }
-        rows.append(row)
-
-
-    df = pd.DataFrame(rows, columns=[
-        "subject","language", "trial","word","attempt","file","path",
-        "duration_s","t_center_s","F0_Hz","F1_Hz","F2_Hz", "F3_Hz"
-    ])
-
-    df.to_csv(OUTPUT_CSV, index=False)
-    print(f"Done. Wrote {len(df)} rows to {OUTPUT_CSV}")
+    parser = argparse.ArgumentParser(description="Extract midpoint F0-F3 for every exemplar WAV.")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="worker processes for per-file extraction (default 1, 0 = all cores)")
+    parser.add_argument("--no-cache", action="store_true", help="ignore and don't update the feature cache")
+    parser.add_argument("--clear-cache", action="store_true", help="drop every cached result before running")
+    parser.add_argument("--trajectory", action="store_true",
+                        help="sample F0-F3 at proportional points of the vowel region instead of the midpoint")
+    parser.add_argument("--points", default=",".join(f"{p * 100:g}" for p in TRAJECTORY_POINTS),
+                        help="trajectory time points in percent of the vowel region (default %(default)s)")
+    parser.add_argument("--format", choices=sorted(FormantTableWriter.FORMATS), default="csv",
+                        help="output table format; parquet/feather are typed and need pyarrow (default csv)")
+    parser.add_argument("--pooled-pitch", action="store_true",
+                        help="one pitch floor/ceiling for the whole corpus instead of per speaker")
+    args = parser.parse_args()
+    jobs = args.jobs or os.cpu_count()
+    if args.trajectory:
+        kind, extractor, keep, output = "trajectory", extract_trajectory, TRAJECTORY_KEYS, TRAJECTORY_CSV
+        points = [float(p) / 100.0 for p in args.points.split(",")]
+    else:
+        kind, extractor, keep, output = "features", extract_features, MEASURE_KEYS, OUTPUT_CSV
+    output = os.path.splitext(output)[0] + FormantTableWriter.FORMATS[args.format]
+
+    with Manifest(MANIFEST_DB) as manifest:
+        manifest.scan(INPUT_ROOT)
+        files = manifest.paths(INPUT_ROOT)
+
+    cache = None if args.no_cache else FeatureCache(CACHE_DB, max_bytes=CACHE_MAX_MB * 1024 * 1024)
+    if cache is not None and args.clear_cache:
+        cache.invalidate()
+
+    # Group files by speaker for pitch-range estimation
+    by = () if args.pooled_pitch else PITCH_GROUP_BY
+    parse_errors = {}
+    groups = {}
+    for i, p in enumerate(files):
+        try:
+            groups.setdefault(group_key(p, by), []).append(i)
+        except ValueError as err:
+            parse_errors[i] = f"{type(err).__name__}: {err}"
+    keys = sorted(groups)
+
+    with ExitStack() as stack:
+        pool = stack.enter_context(ProcessPoolExecutor(max_workers=jobs)) if jobs > 1 else None
+
+        # Pass one: decode each file once, streaming its broad-range F0 into the group's sketch and
+        # keeping a memmapped copy of the samples for pass two. Files with a cached F0 track are
+        # not decoded here (pass two reads them only if their features are not cached either).
+        print('Decoding files')
+        jobs_in = []
+        for key in keys:
+            sketch = F0Sketch()
+            skip = set()
+            for k, i in enumerate(groups[key]):
+                f0 = cache.get("f0", files[i], F0_PARAMS) if cache else None
+                if f0 is not None:
+                    sketch.add(f0)
+                    skip.add(k)
+            jobs_in.append(([files[i] for i in groups[key]], skip, sketch))
+        if pool:
+            futures = [pool.submit(decode_group, *job, **F0_PARAMS) for job in jobs_in]
+            decoded = (fut.result() for fut in futures)
+        else:
+            decoded = (decode_group(*job, **F0_PARAMS) for job in jobs_in)
+
+        corpora = {}
+        ranges = {}
+        for key, (corpus, sketch, new_f0) in zip(keys, decoded):
+            stack.callback(corpus.close)
+            corpora[key] = corpus
+            if cache:
+                for k, f0 in new_f0.items():
+                    cache.put("f0", corpus.paths[k], F0_PARAMS, f0)
+            ranges[key] = pitch_range_from_sketch(sketch)
+            print(f"Pitch range {'/'.join(map(str, key)) or 'all'}: "
+                  f"{ranges[key]['floor']}-{ranges[key]['ceiling']} Hz")
+
+        # Pass two: extraction in file order, with each group's floor/ceiling. Cached files are
+        # looked up again when their turn comes, so rows stream straight into the output table.
+        where = {i: (key, k) for key in keys for k, i in enumerate(groups[key])}
+        settings = {}
+        for key in keys:
+            settings[key] = dict(floor=ranges[key]['floor'], ceiling=ranges[key]['ceiling'],
+                                 max_formant_hz=MAX_FORMANT_HZ, nformants=NFORMANTS,
+                                 winlen_s=WINLEN_S, preemph_hz=PREEMPH_HZ)
+            if args.trajectory:
+                settings[key]["points"] = points
+        cached = set()
+        todo = []
+        for i, p in enumerate(files):
+            if i in parse_errors:
+                continue
+            key, k = where[i]
+            if cache and cache.contains(kind, p, settings[key]):
+                cached.add(i)
+            else:
+                todo.append((corpora[key], k, settings[key], extractor))
+
+        # map() yields results in input order, so the output is the same for any --jobs
+        if pool and len(todo) > 1:
+            extracted = pool.map(extract_corpus_item, *zip(*todo),
+                                 chunksize=max(1, len(todo) // (jobs * 4)))
+        else:
+            extracted = (extract_corpus_item(*a) for a in todo)
+
+        columns = ["subject","language", "trial","word","vowel","length","attempt","file","path", *keep]
+        table = stack.enter_context(FormantTableWriter(output, columns, args.format))
+        failed = []
+        for i, p in enumerate(files):
+            if i in parse_errors:
+                out, err = None, parse_errors[i]
+            elif i in cached:
+                out, err = [file_row(p, m) for m in cache.get(kind, p, settings[where[i][0]], count=False)], None
+            else:
+                out, err = next(extracted)
+                if err is None and not args.trajectory:
+                    out = [out]
+                if cache and err is None:
+                    cache.put(kind, p, settings[where[i][0]], [{k: row[k] for k in keep} for row in out])
+            if err is None:
+                table.write(out)
+            else:
+                failed.append(p)
+                print(f"Failed: {p}: {err}", file=sys.stderr)
+
+    if cache:
+        print(f"Feature cache: {cache.summary()} ({CACHE_DB})")
+        cache.close()
 
+    print(f"Done. Wrote {table.n_rows} rows to {output}")
+    if failed:
+        print(f"{len(failed)} file(s) failed, see messages above")
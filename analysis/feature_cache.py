@@ -0,0 +1,130 @@
+import os, json, time, pickle, sqlite3, hashlib
+from collections import Counter
+
+
+def file_hash(path, chunk=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class FeatureCache:
+    """
+    On-disk (SQLite) cache of per-file results such as F0 tracks and formant measurements.
+
+    A result is stored under (kind, content hash, parameters). The content hash of a path is
+    remembered together with its size and mtime, so unchanged files are never re-read; a file that
+    was touched or replaced is re-hashed and only misses if its bytes actually changed. Entries are
+    evicted least-recently-used once the stored values exceed max_bytes. New entries are committed
+    every commit_every puts, so a run that dies halfway keeps most of what it computed. Hits and
+    misses are counted per kind (summary()).
+    """
+
+    def __init__(self, db_path, max_bytes=512 * 1024 * 1024, commit_every=50):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.commit_every = commit_every
+        self.hits = Counter()
+        self.misses = Counter()
+        self._pending = 0
+        self._db = sqlite3.connect(db_path)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha1 TEXT);
+            CREATE TABLE IF NOT EXISTS entries (
+                kind TEXT, sha1 TEXT, params TEXT, value BLOB, nbytes INTEGER, last_used REAL,
+                PRIMARY KEY (kind, sha1, params));
+            CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_used);
+        """)
+
+    @staticmethod
+    def params_key(params):
+        return json.dumps(params, sort_keys=True)
+
+    def content_hash(self, path):
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        row = self._db.execute("SELECT size, mtime_ns, sha1 FROM files WHERE path = ?", (path,)).fetchone()
+        if row is not None and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+        sha1 = file_hash(path)
+        self._db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                         (path, st.st_size, st.st_mtime_ns, sha1))
+        return sha1
+
+    def get(self, kind, path, params, count=True):
+        """Cached value for path under params, or None. count=False: already counted by contains()."""
+        key = (kind, self.content_hash(path), self.params_key(params))
+        row = self._db.execute(
+            "SELECT value FROM entries WHERE kind = ? AND sha1 = ? AND params = ?", key).fetchone()
+        if count:
+            (self.misses if row is None else self.hits)[kind] += 1
+        if row is None:
+            return None
+        self._db.execute(
+            "UPDATE entries SET last_used = ? WHERE kind = ? AND sha1 = ? AND params = ?", (time.time(), *key))
+        return pickle.loads(row[0])
+
+    def contains(self, kind, path, params):
+        """Whether get() would hit, without loading the value; counted as that hit or miss."""
+        key = (kind, self.content_hash(path), self.params_key(params))
+        found = self._db.execute(
+            "SELECT 1 FROM entries WHERE kind = ? AND sha1 = ? AND params = ?", key).fetchone() is not None
+        (self.hits if found else self.misses)[kind] += 1
+        return found
+
+    def put(self, kind, path, params, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._db.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+            (kind, self.content_hash(path), self.params_key(params), blob, len(blob), time.time()))
+        self._pending += 1
+        if self.commit_every and self._pending >= self.commit_every:
+            self._db.commit()
+            self._pending = 0
+
+    def summary(self):
+        kinds = sorted(set(self.hits) | set(self.misses))
+        return "; ".join(f"{k}: {self.hits[k]} hits, {self.misses[k]} misses" for k in kinds) or "not used"
+
+    def invalidate(self, paths=None):
+        """Drop the entries for the given files, or everything when paths is None."""
+        if paths is None:
+            self._db.execute("DELETE FROM entries")
+            self._db.execute("DELETE FROM files")
+        else:
+            for p in paths:
+                p = os.path.abspath(p)
+                row = self._db.execute("SELECT sha1 FROM files WHERE path = ?", (p,)).fetchone()
+                if row is not None:
+                    self._db.execute("DELETE FROM entries WHERE sha1 = ?", row)
+                    self._db.execute("DELETE FROM files WHERE path = ?", (p,))
+        self._db.commit()
+
+    def evict(self):
+        """Remove least-recently-used entries until the stored values fit in max_bytes."""
+        total = self._db.execute("SELECT COALESCE(SUM(nbytes), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        removed = 0
+        for rowid, nbytes in self._db.execute(
+                "SELECT rowid, nbytes FROM entries ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM entries WHERE rowid = ?", (rowid,))
+            total -= nbytes
+            removed += 1
+        return removed
+
+    def close(self):
+        self.evict()
+        self._db.commit()
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,63 +1,193 @@
-import os
+import os, re, sys, math, tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 import numpy as np
+import pandas as pd
 import parselmouth as pm
 from parselmouth.praat import call
 
+# the task's energy VAD (task/vowel_task/vad.py, NumPy only), so trimming here matches the recording side
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "task"))
+from vowel_task.vad import detect_active_segments
+
+# <ID>_<language>_<trial>_<word>[_<vowel>]_<length>_try<attempt>: the task writes the vowel field,
+# older exemplar files don't have it
+FILENAME_RE = re.compile(
+    r"^(?P<subject>[^_]+)_(?P<language>[^_]+)_(?P<trial>\d+)_(?P<word>[^_]+)"
+    r"(?:_(?P<vowel>[^_]+))?_(?P<length>[^_]+)_try(?P<attempt>\d+)$")
+
+
 def parse_filename(path):
     """
-    Expect: .../subj_<ID>/<language>/<ID>_<language>_<trial>_<word>_<length>_<attempt>.wav
+    Expect: .../subj_<ID>/<language>/<ID>_<language>_<trial>_<word>[_<vowel>]_<length>_try<attempt>.wav
+    ('vowel' is None for names without it).
     """
-    base = os.path.basename(path)                 # "101_23_bik_1.wav"
-    stem, _ = os.path.splitext(base)              # "101_23_bik_1"
-    parts = stem.split("_")
+    base = os.path.basename(path)                 # "101_arabic_023_bik_i_short_try1.wav"
+    stem, _ = os.path.splitext(base)              # "101_arabic_023_bik_i_short_try1"
+    m = FILENAME_RE.match(stem)
 
-    if len(parts) != 6: 
+    if m is None:
         raise ValueError(f"Unable to parse filename {base}")
 
-    trial = int(parts[2])
-    attempt = parts[5].split('try')[1]
-
     return dict(
-        subject=parts[0],
-        language=parts[1],
-        trial=trial,
-        word=parts[3],
-        length=parts[4],
-        attempt=attempt,
+        subject=m["subject"],
+        language=m["language"],
+        trial=int(m["trial"]),
+        word=m["word"],
+        vowel=m["vowel"],
+        length=m["length"],
+        attempt=m["attempt"],
     )
 
 
+def extract_features(path, floor, ceiling, max_formant_hz=5500, nformants=5.0, winlen_s=0.025, preemph_hz=50,
+                     snd=None):
+    """
+    Midpoint F0 and F1-F3 for one file, as an output row (filename fields + measurements).
+    Pass an already decoded `snd` to skip reading the file.
+    """
+    meta = parse_filename(path)
+    if snd is None:
+        snd = pm.Sound(path)
+
+    formants = snd.to_formant_burg(None, nformants, max_formant_hz, winlen_s, preemph_hz)
+    pitch = snd.to_pitch(pitch_floor = floor, pitch_ceiling = ceiling)
+    dur = snd.get_total_duration()
+    tc = dur/2
+
+    F0 = pitch.get_value_at_time(tc)
+    F1 = formants.get_value_at_time(1, tc)
+    F2 = formants.get_value_at_time(2, tc)
+    F3 = formants.get_value_at_time(3, tc)
+
+    return file_row(path, {
+        "duration_s": dur,
+        "t_center_s": tc,
+        "F0_Hz": float("nan") if math.isnan(F0) else float(F0),
+        "F1_Hz": float("nan") if math.isnan(F1) else float(F1),
+        "F2_Hz": float("nan") if math.isnan(F2) else float(F2),
+        "F3_Hz": float("nan") if math.isnan(F3) else float(F3),
+    }, meta)
+
+
+MEASURE_KEYS = ("duration_s", "t_center_s", "F0_Hz", "F1_Hz", "F2_Hz", "F3_Hz")
+
+
+def file_row(path, measured, meta=None):
+    """
+    Output row for one file: filename fields, file/path, then the measurements (MEASURE_KEYS).
+    """
+    return {
+        **(meta if meta is not None else parse_filename(path)),
+        "file": os.path.basename(path),
+        "path": os.path.abspath(path),
+        **measured,
+    }
+
+
+TRAJECTORY_POINTS = (0.20, 0.35, 0.50, 0.65, 0.80)
+TRAJECTORY_KEYS = ("point", "t_s", "region_start_s", "region_end_s", "F0_Hz", "F1_Hz", "F2_Hz", "F3_Hz")
+
+
+def extract_trajectory(path, floor, ceiling, max_formant_hz=5500, nformants=5.0, winlen_s=0.025, preemph_hz=50,
+                       points=TRAJECTORY_POINTS, snd=None):
+    """
+    F0 and F1-F3 at proportional time points of the active (vowel) region, one output row per point.
+    The pitch and formant tracks are pulled out as arrays once and sampled with linear interpolation
+    between frames, as Praat's "Get value at time" does; frames without a value give NaN.
+    """
+    meta = parse_filename(path)
+    if snd is None:
+        snd = pm.Sound(path)
+
+    formants = snd.to_formant_burg(None, nformants, max_formant_hz, winlen_s, preemph_hz)
+    pitch = snd.to_pitch(pitch_floor = floor, pitch_ceiling = ceiling)
+
+    start, end = active_region(snd.values[0], snd.sampling_frequency)
+    t = snd.xmin + start + np.asarray(points) * (end - start)
+
+    def sample(xs, values):
+        values = np.where(values > 0, values, np.nan)   # unvoiced / missing formant
+        return np.interp(t, xs, values, left=np.nan, right=np.nan)
+
+    tracks = {"F0_Hz": sample(pitch.xs(), pitch.selected_array['frequency'])}
+    for n in (1, 2, 3):
+        tracks[f"F{n}_Hz"] = sample(formants.xs(), call(formants, "To Matrix", n).values[0])
+
+    return [file_row(path, {
+        "point": float(points[j]),
+        "t_s": float(t[j]),
+        "region_start_s": float(start),
+        "region_end_s": float(end),
+        **{k: float(v[j]) for k, v in tracks.items()},
+    }, meta) for j in range(len(points))]
+
+
+def active_region(x, sr, frame_ms=10, hangover_ms=50, z=0.5, abs_floor=0.01):
+    """
+    (start_s, end_s) from the first to the last active segment of the task's energy VAD;
+    the whole signal if nothing is active.
+    """
+    segs = detect_active_segments(np.asarray(x), sr, frame_ms, hangover_ms, z, abs_floor)
+    if not segs:
+        return 0.0, len(x) / sr
+    return segs[0][0] / sr, segs[-1][1] / sr
+
+
+def try_extract_features(path, *args, extractor=None, **kwargs):
+    """
+    extract_features (or `extractor`, e.g. extract_trajectory) that reports failure instead of
+    raising: returns (result, None) or (None, error). Module-level so process-pool workers can pickle it.
+    """
+    try:
+        return (extractor or extract_features)(path, *args, **kwargs), None
+    except Exception as err:
+        return None, f"{type(err).__name__}: {err}"
+
+
+
+def broad_f0(snd, time_step=0.01, init_floor=50.0, init_ceiling=600.0, voicing_threshold=None):
+    """
+    Voiced F0 values (Hz) of a broad-range pitch track for one Sound; unvoiced frames are dropped.
+    """
+    if voicing_threshold is None:
+        pitch = snd.to_pitch(time_step=time_step, pitch_floor=init_floor, pitch_ceiling=init_ceiling)
+    else:
+        # Use autocorrelation variant if you want explicit thresholds
+        pitch = snd.to_pitch_ac(None, init_floor, 15, False, 0.03, voicing_threshold, 0.01, 0.35, 0.14, init_ceiling)
+    f0 = pitch.selected_array['frequency']  # unvoiced -> 0.0
+    return f0[np.isfinite(f0) & (f0 > 0)]
+
 
 def estimate_pitch_range(
     paths,
     time_step=0.01,              # 10 ms frames
     init_floor=50.0, init_ceiling=600.0,
     voicing_threshold=None,      # None = library default
+    **range_kwargs
+):
+    """
+    Estimate a speaker-specific F0 floor/ceiling from multiple files.
+    Returns dict with 'floor', 'ceiling' and diagnostics (see pitch_range_from_f0).
+    """
+    print('Estimating pitch range')
+
+    all_f0 = [broad_f0(pm.Sound(p), time_step, init_floor, init_ceiling, voicing_threshold) for p in paths]
+    return pitch_range_from_f0(all_f0, **range_kwargs)
+
+
+def pitch_range_from_f0(
+    all_f0,
     low_clip=45.0, high_clip=800.0,
     pct_low=5.0, pct_high=95.0,
     margin_low=10.0, margin_high=20.0,
     hard_floor=50.0, hard_ceiling=600.0
 ):
     """
-    Estimate a speaker-specific F0 floor/ceiling from multiple files.
+    F0 floor/ceiling from a list of per-file voiced F0 arrays (as returned by broad_f0).
     Returns dict with 'floor', 'ceiling' and diagnostics.
     """
-    print('Estimating pitch range')
-
-    all_f0 = []
-
-    for p in paths:
-        snd = pm.Sound(p)
-        # Build a broad-range pitch track
-        if voicing_threshold is None:
-            pitch = snd.to_pitch(time_step=time_step, pitch_floor=init_floor, pitch_ceiling=init_ceiling)
-        else:
-            # Use autocorrelation variant if you want explicit thresholds
-            pitch = snd.to_pitch_ac(None, init_floor, 15, False, 0.03, voicing_threshold, 0.01, 0.35, 0.14, init_ceiling)
-        f0 = pitch.selected_array['frequency']  # unvoiced -> 0.0
-        f0 = f0[np.isfinite(f0) & (f0 > 0)]
-        if f0.size:
-            all_f0.append(f0)
+    all_f0 = [f0 for f0 in all_f0 if f0.size]
 
     if not all_f0:
         return {"floor": hard_floor, "ceiling": hard_ceiling, "n_voiced": 0, "note": "no voiced frames found"}
@@ -94,6 +224,11 @@ def estimate_pitch_range(
     # Percentile-based bounds + margins, clamped to hard bounds
     lo = np.percentile(f0_clean, pct_low)
     hi = np.percentile(f0_clean, pct_high)
+    return _pitch_range(lo, hi, f0_clean.size, np.median(f0_clean),
+                        margin_low, margin_high, hard_floor, hard_ceiling)
+
+
+def _pitch_range(lo, hi, n_voiced, median_f0, margin_low, margin_high, hard_floor, hard_ceiling):
     floor = float(max(hard_floor, lo - margin_low))
     ceiling = float(min(hard_ceiling, hi + margin_high))
     # ensure sensible ordering and minimal span
@@ -103,8 +238,327 @@ def estimate_pitch_range(
     return {
         "floor": round(floor, 2),
         "ceiling": round(ceiling, 2),
-        "n_voiced": int(f0_clean.size),
-        "median_f0": round(float(np.median(f0_clean)), 2),
+        "n_voiced": int(n_voiced),
+        "median_f0": round(float(median_f0), 2),
         "p5": round(float(lo), 2),
         "p95": round(float(hi), 2)
     }
+
+
+class F0Sketch:
+    """
+    Mergeable, fixed-size summary of voiced F0 values: a histogram of log-F0 in `cents`-wide bins.
+    Frames outside [low_clip, high_clip] are dropped on add (the same pre-clean as pitch_range_from_f0);
+    the bins extend one octave beyond that on each side so octave folding stays in range. Quantiles,
+    median and MAD read off the histogram are exact to within one bin.
+    """
+
+    def __init__(self, low_clip=45.0, high_clip=800.0, cents=1):
+        self.low_clip = low_clip
+        self.high_clip = high_clip
+        self.octave = int(1200 // cents)                     # bins per octave
+        self.width = np.log(2.0) / self.octave
+        self.origin = np.log(low_clip / 2.0)
+        self.counts = np.zeros(int(np.ceil(np.log(4.0 * high_clip / low_clip) / self.width)) + 1, dtype=np.int64)
+
+    @property
+    def n(self):
+        return int(self.counts.sum())
+
+    def add(self, f0):
+        f0 = np.asarray(f0, dtype=np.float64)
+        f0 = f0[(f0 >= self.low_clip) & (f0 <= self.high_clip)]
+        idx = ((np.log(f0) - self.origin) / self.width).astype(np.int64)
+        self.counts += np.bincount(idx, minlength=self.counts.size)
+        return self
+
+    def merge(self, other):
+        self.counts += other.counts
+        return self
+
+    def log_centers(self):
+        return self.origin + (np.arange(self.counts.size) + 0.5) * self.width
+
+    @staticmethod
+    def weighted_quantile(values, counts, q):
+        """q-th percentile (linear interpolation, like np.percentile) of values repeated counts times."""
+        order = np.argsort(values, kind="stable")
+        values, cum = values[order], np.cumsum(counts[order])
+        rank = q / 100.0 * (cum[-1] - 1)
+        lo = np.searchsorted(cum, np.floor(rank), side="right")
+        hi = np.searchsorted(cum, np.ceil(rank), side="right")
+        return values[lo] + (rank - np.floor(rank)) * (values[hi] - values[lo])
+
+
+def pitch_range_from_sketch(
+    sketch,
+    pct_low=5.0, pct_high=95.0,
+    margin_low=10.0, margin_high=20.0,
+    hard_floor=50.0, hard_ceiling=600.0
+):
+    """
+    pitch_range_from_f0 computed on an F0Sketch: octave folding around the median, log-Hz MAD filter
+    and percentile bounds all work on the histogram, so memory does not grow with the corpus.
+    """
+    counts = sketch.counts
+    if not counts.any():
+        return {"floor": hard_floor, "ceiling": hard_ceiling, "n_voiced": 0, "note": "no voiced frames found"}
+    lc = sketch.log_centers()
+
+    # Rough de-octave around median so halves/doubles fold toward the center
+    med = np.exp(sketch.weighted_quantile(lc, counts, 50.0))
+    ratio = np.exp(lc) / med
+    fold = counts.copy()
+    down = np.flatnonzero((ratio > 1.9) & (counts > 0))
+    fold[down] -= counts[down]
+    fold[down - sketch.octave] += counts[down]
+    moved = fold.copy()
+    up = np.flatnonzero((np.exp(lc) / med < 0.55) & (moved > 0))
+    fold[up] -= moved[up]
+    fold[up + sketch.octave] += moved[up]
+
+    # Robust outlier filter in log-Hz
+    med_l = sketch.weighted_quantile(lc, fold, 50.0)
+    dev = np.abs(lc - med_l)
+    mad = sketch.weighted_quantile(dev, fold, 50.0) + 1e-9
+    clean = np.where(dev / (1.4826 * mad) < 3.5, fold, 0)
+
+    if clean.sum() < 30:  # not much data; fall back to less strict filter
+        clean = fold
+
+    lo = np.exp(sketch.weighted_quantile(lc, clean, pct_low))
+    hi = np.exp(sketch.weighted_quantile(lc, clean, pct_high))
+    return _pitch_range(lo, hi, clean.sum(), np.exp(sketch.weighted_quantile(lc, clean, 50.0)),
+                        margin_low, margin_high, hard_floor, hard_ceiling)
+
+
+def group_key(path, by=("subject", "language")):
+    meta = parse_filename(path)
+    return tuple(meta[k] for k in by)
+
+
+def sketch_f0(paths, sketch=None, **f0_kwargs):
+    """Stream files through broad_f0 into an F0Sketch (new, or the one passed in)."""
+    sketch = sketch if sketch is not None else F0Sketch()
+    for p in paths:
+        sketch.add(broad_f0(pm.Sound(p), **f0_kwargs))
+    return sketch
+
+
+def estimate_pitch_ranges(paths, by=("subject", "language"), jobs=1, **f0_kwargs):
+    """
+    Speaker-specific F0 floor/ceiling: one estimate per group of files (default: subject and language),
+    streamed through F0Sketches. Groups run in parallel with jobs > 1. Returns {group: range dict}.
+    """
+    groups = {}
+    for p in paths:
+        groups.setdefault(group_key(p, by), []).append(p)
+    keys = sorted(groups)
+    work = partial(sketch_f0, **f0_kwargs)
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            sketches = list(pool.map(work, [groups[k] for k in keys]))
+    else:
+        sketches = [work(groups[k]) for k in keys]
+    return {k: pitch_range_from_sketch(sk) for k, sk in zip(keys, sketches)}
+
+
+class DecodedCorpus:
+    """
+    Decodes every file once: samples go into one float32 memory-mapped file, and the broad-range F0
+    track (broad_f0) of each file is kept alongside. Later passes rebuild Sounds from the memmap with
+    sound(i) instead of reading the files again (exact for 16- and 24-bit PCM). Picklable, so process-pool
+    workers can open the same memmap. Files that fail to decode get an entry in `errors`; files listed in
+    `skip` (e.g. F0 already cached) are not decoded, and extraction reads them directly.
+    """
+
+    def __init__(self, paths, cache_dir=None, skip=(), **f0_kwargs):
+        self.paths = list(paths)
+        self.offsets = np.zeros(len(self.paths), dtype=np.int64)
+        self.shapes = [None] * len(self.paths)
+        self.srs = np.zeros(len(self.paths))
+        self.f0 = [None] * len(self.paths)
+        self.errors = {}
+
+        fd, self.data_path = tempfile.mkstemp(suffix=".f32", prefix="decoded-", dir=cache_dir)
+        pos = 0
+        with os.fdopen(fd, "wb") as out:
+            for i, p in enumerate(self.paths):
+                if i in skip:
+                    continue
+                try:
+                    snd = pm.Sound(p)
+                    self.f0[i] = broad_f0(snd, **f0_kwargs)
+                except Exception as err:
+                    self.errors[i] = f"{type(err).__name__}: {err}"
+                    continue
+                values = snd.values.astype(np.float32)
+                out.write(values.tobytes())
+                self.offsets[i] = pos
+                self.shapes[i] = values.shape
+                self.srs[i] = snd.sampling_frequency
+                pos += values.size
+        self._data = None
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_data"] = None
+        state["f0"] = None      # workers only need the samples
+        return state
+
+    def sound(self, i):
+        """Sound for file i, built from the memmapped samples (None if it was not decoded)."""
+        if self.shapes[i] is None:
+            return None
+        if self._data is None:
+            self._data = np.memmap(self.data_path, dtype=np.float32, mode="r")
+        n = int(np.prod(self.shapes[i]))
+        values = self._data[self.offsets[i]:self.offsets[i] + n].reshape(self.shapes[i])
+        return pm.Sound(values.astype(np.float64), sampling_frequency=self.srs[i])
+
+    def close(self):
+        self._data = None
+        if os.path.exists(self.data_path):
+            os.remove(self.data_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def decode_group(paths, skip=(), sketch=None, cache_dir=None, **f0_kwargs):
+    """
+    Decode one group's files (e.g. one speaker) into its own DecodedCorpus and add their F0 to the
+    group's F0Sketch. Returns (corpus, sketch, {index: f0} for the files decoded here).
+    """
+    corpus = DecodedCorpus(paths, cache_dir, skip, **f0_kwargs)
+    sketch = sketch if sketch is not None else F0Sketch()
+    new_f0 = {i: f0 for i, f0 in enumerate(corpus.f0) if f0 is not None}
+    for f0 in new_f0.values():
+        sketch.add(f0)
+    corpus.f0 = None
+    return corpus, sketch, new_f0
+
+
+def extract_corpus_item(corpus, i, settings, extractor=None):
+    """try_extract_features(**settings) for corpus file i, reusing its decoded samples."""
+    if i in corpus.errors:
+        return None, corpus.errors[i]
+    return try_extract_features(corpus.paths[i], snd=corpus.sound(i), extractor=extractor, **settings)
+
+
+CATEGORY_COLUMNS = ("subject", "language", "word", "vowel", "length")
+
+
+class FormantTableWriter:
+    """
+    Writes output rows in batches of `batch_rows` as they arrive, as CSV, Parquet (one row group per
+    batch) or Arrow IPC / Feather v2. The columnar formats get a typed schema: dictionary-encoded
+    CATEGORY_COLUMNS, int32 trial/attempt, float32 *_Hz columns, float64 for everything else numeric.
+    pyarrow is only needed for parquet/feather.
+    """
+
+    FORMATS = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather"}
+
+    def __init__(self, path, columns, fmt="csv", batch_rows=5000):
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unknown output format {fmt!r}, expected one of {sorted(self.FORMATS)}")
+        self.path = path
+        self.columns = list(columns)
+        self.fmt = fmt
+        self.batch_rows = batch_rows
+        self.n_rows = 0
+        self._buf = []
+        self._writer = None
+        if fmt != "csv":
+            try:
+                import pyarrow as pa
+            except ImportError:
+                raise ImportError(f"Writing {fmt} output requires pyarrow (pip install pyarrow)")
+            self._pa = pa
+            self.schema = pa.schema([(c, self._arrow_type(c)) for c in self.columns])
+            self._dicts = {c: {} for c in self.columns if c in CATEGORY_COLUMNS}
+
+    def _arrow_type(self, col):
+        pa = self._pa
+        if col in CATEGORY_COLUMNS:
+            return pa.dictionary(pa.int32(), pa.string())
+        if col in ("trial", "attempt"):
+            return pa.int32()
+        if col in ("file", "path"):
+            return pa.string()
+        if col.endswith("_Hz") or col == "point":
+            return pa.float32()
+        return pa.float64()
+
+    def write(self, rows):
+        self._buf.extend(rows)
+        if len(self._buf) >= self.batch_rows:
+            self._flush()
+
+    def _flush(self):
+        if not self._buf and self.n_rows:
+            return
+        df = pd.DataFrame(self._buf, columns=self.columns)
+        self._buf = []
+        if self.fmt == "csv":
+            df.to_csv(self.path, mode="a" if self.n_rows else "w", header=not self.n_rows, index=False)
+        else:
+            self._write_arrow(df)
+        self.n_rows += len(df)
+
+    def _write_arrow(self, df):
+        pa = self._pa
+        arrays = []
+        for col, field in zip(self.columns, self.schema):
+            if col in self._dicts:
+                # one running dictionary per column, so later batches only add to it; missing
+                # values (e.g. vowel for names without it) are nulls, not a "nan" category
+                codes = self._dicts[col]
+                idx = [None if pd.isna(v) else codes.setdefault(str(v), len(codes)) for v in df[col]]
+                arrays.append(pa.DictionaryArray.from_arrays(
+                    pa.array(idx, pa.int32()), pa.array(list(codes), pa.string())))
+            else:
+                values = df[col] if pa.types.is_string(field.type) else pd.to_numeric(df[col])
+                arrays.append(pa.array(values, type=field.type, from_pandas=True))
+        batch = pa.record_batch(arrays, schema=self.schema)
+        if self._writer is None:
+            if self.fmt == "parquet":
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(self.path, self.schema)
+            else:
+                import pyarrow.ipc as ipc
+                self._writer = ipc.new_file(self.path, self.schema,
+                                            options=ipc.IpcWriteOptions(emit_dictionary_deltas=True))
+        if self.fmt == "parquet":
+            self._writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            self._writer.write_batch(batch)
+
+    def close(self):
+        if self._buf or not self.n_rows:
+            self._flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_formant_table(path):
+    """Load a table written by FormantTableWriter (format from the extension) into a DataFrame."""
+    ext = os.path.splitext(path)[1]
+    if ext == ".parquet":
+        return pd.read_parquet(path)
+    if ext in (".feather", ".arrow"):
+        return pd.read_feather(path)
+    return pd.read_csv(path)
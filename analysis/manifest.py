@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+
+import os, csv, sys, sqlite3, argparse
+import pandas as pd
+from functions import FILENAME_RE
+
+AUDIO_EXTS = (".wav", ".flac")
+LOG_SUFFIX = "_vowels_"          # session logs: <ID>_<language>_vowels_<stamp>.csv
+STREAM_SUFFIX = "_stream_"       # session streams (<ID>_<language>_stream_<stamp>.wav/.flac), not takes
+TAKE_FIELDS = ("subject", "language", "trial", "word", "vowel", "length", "attempt")
+LOG_FIELDS = ("active_duration_s", "active_rms", "passed", "final", "log_file")
+
+
+class Manifest:
+    """
+    Indexed table (SQLite) of every take under a data root (subj_*/<language>/...): filename fields,
+    file size/mtime, and the columns the task logged for that take (active_duration_s, active_rms,
+    passed, final), joined on the file name without extension (logs name .wav files; takes may have
+    been converted to FLAC since, and one kept as both is indexed once, as its WAV). Rescans only
+    re-read directories where a log or take was added, removed or changed size/mtime (a row
+    appended to a log or a take rewritten in place does not change the directory's mtime).
+    Names that don't match FILENAME_RE are kept with empty fields so callers can report them.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._db = sqlite3.connect(db_path)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime_ns INTEGER);
+            CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, dir TEXT, size INTEGER, mtime_ns INTEGER);
+            CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+            CREATE TABLE IF NOT EXISTS takes (
+                path TEXT PRIMARY KEY, dir TEXT, file TEXT, size INTEGER, mtime_ns INTEGER,
+                subject TEXT, language TEXT, trial INTEGER, word TEXT, vowel TEXT, length TEXT,
+                attempt INTEGER, active_duration_s REAL, active_rms REAL, passed INTEGER,
+                final INTEGER, log_file TEXT);
+            CREATE INDEX IF NOT EXISTS takes_dir ON takes (dir);
+            CREATE INDEX IF NOT EXISTS takes_subject ON takes (subject, language, length, passed);
+            CREATE INDEX IF NOT EXISTS takes_vowel ON takes (language, vowel, passed);
+        """)
+
+    def scan(self, root):
+        """Index (or re-index) root; returns the number of directories that were (re)read."""
+        root = os.path.abspath(root)
+        seen = set()
+        changed = 0
+        for subj in _scandir(root):
+            if not (subj.is_dir() and subj.name.startswith("subj_")):
+                continue
+            for lang in _scandir(subj.path):
+                if not lang.is_dir():
+                    continue
+                seen.add(lang.path)
+                entries = [e for e in _scandir(lang.path) if e.is_file() and _kind(e.name)]
+                files = {e.path: (e.stat().st_size, e.stat().st_mtime_ns) for e in entries}
+                stored = {p: (size, mtime) for p, size, mtime in self._db.execute(
+                    "SELECT path, size, mtime_ns FROM files WHERE dir = ?", (lang.path,))}
+                indexed = self._db.execute("SELECT 1 FROM dirs WHERE path = ?", (lang.path,)).fetchone()
+                if indexed is not None and files == stored:
+                    continue
+                self._index_dir(lang.path, entries)
+                self._db.execute("DELETE FROM files WHERE dir = ?", (lang.path,))
+                self._db.executemany("INSERT INTO files VALUES (?, ?, ?, ?)",
+                                     [(p, lang.path, *st) for p, st in files.items()])
+                self._db.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?)",
+                                 (lang.path, lang.stat().st_mtime_ns))
+                changed += 1
+
+        # directories that disappeared since the last scan
+        for (path,) in self._db.execute("SELECT path FROM dirs").fetchall():
+            if path.startswith(root + os.sep) and path not in seen:
+                self._db.execute("DELETE FROM takes WHERE dir = ?", (path,))
+                self._db.execute("DELETE FROM files WHERE dir = ?", (path,))
+                self._db.execute("DELETE FROM dirs WHERE path = ?", (path,))
+        self._db.commit()
+        return changed
+
+    def _index_dir(self, path, entries):
+        by_stem = {}
+        logs = []
+        for entry in entries:
+            stem, ext = os.path.splitext(entry.name)
+            if _kind(entry.name) == "log":
+                logs.append(entry.path)
+            else:
+                st = entry.stat()
+                m = FILENAME_RE.match(stem)
+                fields = [None] * len(TAKE_FIELDS)
+                if m is not None:
+                    fields = [m[k] for k in TAKE_FIELDS]
+                    fields[2] = int(fields[2])
+                    fields[6] = int(fields[6])
+                # a take kept as both WAV and FLAC (converted without --delete) is indexed once, as its WAV
+                if stem not in by_stem or ext.lower() == AUDIO_EXTS[0]:
+                    by_stem[stem] = [entry.path, path, entry.name, st.st_size, st.st_mtime_ns,
+                                     *fields, None, None, None, None, None]
+
+        # join the session logs (older logs only have the final attempt of each item)
+        for log in sorted(logs):
+            with open(log, newline="", encoding="utf-8") as f:
+                for rec in csv.DictReader(f):
+                    stem = os.path.splitext(os.path.basename(rec.get("rec_path") or ""))[0]
+                    if stem in by_stem:
+                        by_stem[stem][-5:] = [_num(rec.get("active_duration_s")), _num(rec.get("active_rms")),
+                                              _int(rec.get("passed")), _int(rec.get("final", "1")),
+                                              os.path.basename(log)]
+
+        self._db.execute("DELETE FROM takes WHERE dir = ?", (path,))
+        self._db.executemany(f"INSERT INTO takes VALUES ({', '.join('?' * 17)})", by_stem.values())
+
+    def query(self, columns="*", root=None, **where):
+        """
+        Takes matching all keyword filters (column=value, None matches NULL), ordered by path,
+        as a DataFrame, e.g. query(subject="101", length="long", passed=1). With root, only the
+        takes under that data root (the database may also index others).
+        """
+        clauses = []
+        values = []
+        if root is not None:
+            prefix = os.path.abspath(root) + os.sep
+            clauses.append("substr(dir, 1, ?) = ?")
+            values += [len(prefix), prefix]
+        for col, val in where.items():
+            if col not in TAKE_FIELDS + LOG_FIELDS + ("dir", "file"):
+                raise ValueError(f"Unknown manifest column {col!r}")
+            if val is None:
+                clauses.append(f"{col} IS NULL")
+            else:
+                clauses.append(f"{col} = ?")
+                values.append(val)
+        sql = f"SELECT {columns} FROM takes"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return pd.read_sql_query(sql + " ORDER BY path", self._db, params=values)
+
+    def paths(self, root=None, **where):
+        return self.query("path", root, **where)["path"].tolist()
+
+    def close(self):
+        self._db.commit()
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _scandir(path):
+    with os.scandir(path) as it:
+        return sorted(it, key=lambda e: e.name)
+
+
+def _kind(name):
+    """'log' for a session log, 'take' for a take (WAV or FLAC, not a session stream), else None."""
+    stem, ext = os.path.splitext(name)
+    if ext.lower() == ".csv" and LOG_SUFFIX in stem:
+        return "log"
+    if ext.lower() in AUDIO_EXTS and STREAM_SUFFIX not in stem:
+        return "take"
+    return None
+
+
+def _num(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def _int(v):
+    v = _num(v)
+    return None if v is None else int(v)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Index a data tree (subj_*/<language>/) into a manifest.")
+    parser.add_argument("root", help="data root, e.g. ../data or ../exemplars")
+    parser.add_argument("--db", default="corpus-manifest.sqlite", help="manifest database (default %(default)s)")
+    parser.add_argument("--where", action="append", default=[], metavar="COL=VALUE",
+                        help="print the takes matching these filters, e.g. --where passed=1 --where length=long")
+    args = parser.parse_args()
+
+    with Manifest(args.db) as manifest:
+        changed = manifest.scan(args.root)
+        where = dict(w.split("=", 1) for w in args.where)
+        takes = manifest.query(root=args.root, **where)
+        if where:
+            takes.to_csv(sys.stdout, index=False)
+        else:
+            print(f"{len(takes)} takes indexed in {args.db} ({changed} director(ies) rescanned)")
@@ -1,5 +1,5 @@
 #!/bin/bash
 
-while IFS= read -r file; do
-    cp "$file" ../exemplars/clean
-done < /Users/letitiaho/src/arabic-vowel-task/analysis/best-exemplar-paths.txt
+# Superseded by export-exemplars.py (parallel, link/reflink/copy, keeps subj_*/language/ apart).
+# Reads best-exemplars.csv from exemplars.py; pass a path list or options through as needed.
+cd "$(dirname "$0")" && exec python3 export-exemplars.py "$@"
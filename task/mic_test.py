@@ -0,0 +1,34 @@
+import os
+from vowel_task import TaskConfig
+from vowel_task.audio import setup_input, run_take, save_wav
+
+# =========================
+# Config
+# =========================
+# Same device, VAD and pass/fail thresholds as the Arabic task (long vowels are the stricter case)
+CONFIG = TaskConfig(
+    language        = "mic_test",
+    min_dur_short_s = 0.12,
+    min_dur_long_s  = 0.22,
+    max_rec_short_s = 1.20,
+    max_rec_long_s  = 2.20,
+    min_active_rms  = 0.015,
+)
+VLEN     = "long"
+SAVE_DIR = "../data/mic_test"     # last take is kept here for listening back
+
+# =========================
+# Level check
+# =========================
+setup_input(CONFIG)
+os.makedirs(SAVE_DIR, exist_ok=True)
+print(f"Mic test: needs >= {CONFIG.min_dur(VLEN):.3f} s of active speech at RMS >= {CONFIG.min_active_rms:.3f}")
+
+n = 0
+while input("\nPress ENTER and say a word (q + ENTER to quit): ").strip().lower() != "q":
+    x, start, end, act_dur_s, act_rms, passed = run_take(CONFIG, VLEN)
+    n += 1
+    wav_path = os.path.join(SAVE_DIR, "mic_test.wav")
+    save_wav(wav_path, x[start:end], CONFIG.sample_rate)
+    verdict = "PASS" if passed else "too quiet" if act_rms < CONFIG.min_active_rms else "too short"
+    print(f"take {n}: active {act_dur_s:.3f} s, RMS {act_rms:.4f} -> {verdict}  ({wav_path})")
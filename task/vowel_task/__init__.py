@@ -0,0 +1,15 @@
+"""
+Shared core of the vowel production tasks. The entry points (vowel_task_arabic.py,
+vowel_task_english.py, mic_test.py) only build a TaskConfig; everything else lives here once:
+
+    vad      energy VAD and take statistics (NumPy only; also used by analysis/)
+    audio    device setup, recording and scoring one take, WAV/FLAC writing
+    session  per-attempt CSV log
+    stream   one memory-mapped WAV per session instead of per-take WAVs, its reader and export
+    display  PsychoPy helpers
+    runner   the trial loop (PsychoPy)
+
+Submodules are imported on demand so that the VAD does not pull in PsychoPy or sounddevice.
+"""
+
+from .config import TaskConfig
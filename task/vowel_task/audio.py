@@ -0,0 +1,184 @@
+"""Recording from the input device and WAV/FLAC writing."""
+
+import time, queue, threading
+import numpy as np
+import sounddevice as sd
+from .vad import StreamingVAD
+from .stream import to_pcm16
+
+
+def record_take(max_rec_s, sr, channels=1, vad=None, early_stop=True, stop_silence_ms=400, min_speech_s=0.0,
+                min_rec_s=0.0, timer=None, out=None):
+    """
+    Record from the default input device through an InputStream callback, feeding each block to a
+    StreamingVAD (pass one in to call finalize() on it afterwards). With early_stop, the take ends once
+    stop_silence_ms of silence follows a segment of at least min_speech_s (so a click or lip smack
+    before the word doesn't end it), and never before min_rec_s; max_rec_s is always a hard cap.
+    Returns a (n_samples, channels) float32 array like sd.rec: a view of `out` (e.g. a BufferPool
+    buffer, filled in place) when given, else of a new array. An AttemptTimer passed as `timer` gets
+    the stream start, first block and end times, and the input latency the stream reports.
+    """
+    n_max = int(max_rec_s * sr)
+    if out is None:
+        buf = np.empty((n_max, channels), dtype=np.float32)
+    elif out.dtype != np.float32 or out.ndim != 2 or out.shape[1] != channels or len(out) < n_max:
+        raise ValueError(f"out must be float32 with shape (>= {n_max}, {channels}), got {out.dtype} {out.shape}")
+    else:
+        buf = out[:n_max]
+    filled = queue.Queue()
+    pos = [0]
+    t_first = []
+
+    def callback(indata, frames, time_info, status):
+        if status:
+            print(status)
+        i = pos[0]
+        if i == 0:
+            t_first.append(time.perf_counter())
+        k = min(frames, n_max - i)
+        buf[i:i + k] = indata[:k]
+        pos[0] = i + k
+        filled.put(pos[0])
+        if pos[0] >= n_max:
+            raise sd.CallbackStop
+
+    if vad is None:
+        vad = StreamingVAD(sr)
+    done = 0
+    if timer is not None:
+        timer.mark("stream_start")
+    with sd.InputStream(samplerate=sr, channels=channels, dtype='float32', callback=callback) as stream:
+        if timer is not None:
+            timer.set_input_latency(stream.latency)
+        while done < n_max:
+            try:
+                end = filled.get(timeout=max_rec_s + 1.0)
+            except queue.Empty:
+                raise RuntimeError("No audio received from the input device")
+            vad.process(buf[done:end, 0])
+            done = end
+            if (early_stop and done >= min_rec_s * sr and vad.speech_seen and vad.longest_active_s >= min_speech_s
+                    and vad.trailing_silence_s * 1000.0 >= stop_silence_ms):
+                break
+    if timer is not None:
+        timer.mark("rec_end")
+        if t_first:
+            timer.mark("first_block", t_first[0])
+    # samples delivered while the stream was shutting down
+    vad.process(buf[done:pos[0], 0])
+    return buf[:pos[0]]
+
+
+def save_wav(path, x, sr):
+    """16-bit WAV or FLAC, by the extension of path; quantised here so both hold the same samples."""
+    import soundfile as sf      # first use is on the writer thread, off the startup path
+    sf.write(path, to_pcm16(x), sr, subtype="PCM_16")
+
+
+class BufferPool:
+    """
+    Preallocated (n_samples, channels) float32 recording buffers, reused across attempts so the
+    trial loop doesn't allocate a new array per take. acquire() hands out a free buffer, or allocates
+    one more (counted in `grown`) if all are still waiting to be written; release() returns it.
+    Thread-safe, so the WAV writer can release buffers when it is done with them.
+    """
+
+    def __init__(self, n_samples, channels=1, count=4):
+        self.shape = (n_samples, channels)
+        self.grown = 0
+        self._free = queue.LifoQueue()
+        for _ in range(count):
+            self._free.put(np.zeros(self.shape, dtype=np.float32))
+
+    def acquire(self):
+        try:
+            return self._free.get_nowait()
+        except queue.Empty:
+            self.grown += 1
+            return np.zeros(self.shape, dtype=np.float32)
+
+    def release(self, buf):
+        self._free.put(buf)
+
+
+class WavWriter:
+    """
+    Writes WAVs (or FLACs) with save_wav on a background thread, fed through a bounded queue, so the trial loop
+    never waits on the disk. An error in the worker is re-raised in the calling thread by the next
+    submit(), check(), flush() or close(). Arrays must not be modified after they are submitted;
+    `done` (e.g. returning the recording buffer to its BufferPool) is called on the writer thread
+    once the file is written or has failed. write_s holds the time each file took to write.
+    """
+
+    def __init__(self, maxsize=16):
+        self.write_s = []
+        self._jobs = queue.Queue(maxsize=maxsize)
+        self._errors = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="wav-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            try:
+                if job is None:
+                    return
+                path, x, sr, done = job
+                t = time.perf_counter()
+                save_wav(path, x, sr)
+                self.write_s.append(time.perf_counter() - t)
+            except Exception as err:
+                self._errors.put((job[0], err))
+            finally:
+                if job is not None and job[3] is not None:
+                    job[3]()
+                self._jobs.task_done()
+
+    def submit(self, path, x, sr, done=None):
+        self.check()
+        self._jobs.put((path, x, sr, done))
+
+    def check(self):
+        if not self._errors.empty():
+            path, err = self._errors.get()
+            raise RuntimeError(f"Failed to write {path}: {err}") from err
+
+    def flush(self):
+        """Block until every submitted file is on disk."""
+        self._jobs.join()
+        self.check()
+
+    def close(self):
+        self._jobs.put(None)
+        self._thread.join()
+        self.check()
+
+
+def setup_input(cfg):
+    sd.default.device = (cfg.device, None)   # input only
+    sd.default.samplerate = cfg.sample_rate
+    sd.default.channels = cfg.channels
+    sd.default.dtype = 'float32'
+    sd.check_input_settings(device=cfg.device, channels=cfg.channels, samplerate=cfg.sample_rate)
+
+
+def run_take(cfg, vlen, timer=None, out=None):
+    """
+    Record one take (into `out`, if given) and score it. Returns (x, start, end, act_dur_s, act_rms,
+    passed): the recording, the take trimmed to its active span with 20 ms pre/post-roll as
+    x[start:end], and the active-speech duration and RMS.
+    """
+    sr = cfg.sample_rate
+    vad = StreamingVAD(sr, **cfg.vad_params())
+    rec = record_take(cfg.max_rec(vlen), sr, cfg.channels, vad, early_stop=cfg.early_stop,
+                      stop_silence_ms=cfg.stop_silence_ms, min_speech_s=cfg.min_dur(vlen),
+                      min_rec_s=cfg.min_rec_s, timer=timer, out=out)
+
+    # Trim to the active span (20 ms pre/post-roll) and score it, from the frame energies
+    # already computed block-by-block while recording
+    x = rec.ravel()
+    start, end, act_dur_s, act_rms = vad.analyze(x)
+    passed = (act_dur_s >= cfg.min_dur(vlen)) and (act_rms >= cfg.min_active_rms)
+    if timer is not None:
+        timer.mark("vad_done")
+    return x, start, end, act_dur_s, act_rms, passed
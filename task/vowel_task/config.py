@@ -0,0 +1,90 @@
+"""Per-language task settings."""
+
+from dataclasses import dataclass
+
+CODECS = {"wav": ".wav", "flac": ".flac"}     # storage_codec -> file extension (16-bit PCM either way)
+
+
+@dataclass
+class TaskConfig:
+    """
+    Everything that differs between the Arabic, English and mic-test entry points. The defaults are
+    the recording and VAD settings shared by all of them.
+    """
+
+    language: str
+    words_csv: str = ""
+    welcome: str = ""
+    instructions: str = ""
+    repeats: int = 1                # each word is presented this many times, spread through the session
+
+    # Duration thresholds for ACTIVE speech (not total recording length), by vowel length
+    min_dur_short_s: float = 0.15
+    min_dur_long_s: float = 0.15
+
+    # Recording window caps (enough time to speak; not used for pass/fail)
+    max_rec_short_s: float = 2.00
+    max_rec_long_s: float = 2.00
+
+    # Volume threshold (RMS of active segment)
+    min_active_rms: float = 0.015
+
+    # Audio device
+    sample_rate: int = 48000
+    channels: int = 1
+    device: int = 3                 # MOTU input
+
+    # Energy detection parameters
+    frame_ms: int = 10              # frame step for activity detection
+    hangover_ms: int = 50           # keep activity "on" this long after falling below threshold
+    activity_zscore: float = 0.5    # relative threshold: frames above (mean + z * std)
+    abs_floor: float = 0.01         # absolute floor on frame RMS to avoid too-low thresholds
+
+    # Task flow
+    max_retries_per_item: int = 3
+    log_fsync_every: int = 10       # fsync the session log every N attempt rows
+
+    # Early stop: end the recording once this much silence follows detected speech, armed only by
+    # a segment at least as long as the item's min_dur and never before min_rec_s
+    # (the recording window cap still applies)
+    early_stop: bool = True
+    stop_silence_ms: int = 400
+    min_rec_s: float = 0.8
+
+    # Live formant check: F1/F2 of each take by LPC, flagged on the console when it is more than
+    # formant_max_z SDs from its vowel's target (CSV from analysis/exemplars.py --targets)
+    live_formants: bool = True
+    formant_targets_csv: str = ""
+    formant_max_z: float = 2.5
+
+    # Recording buffers, preallocated for the longest window and reused across attempts
+    buffer_pool: int = 4
+    debug_alloc: bool = False       # print the memory allocated during each attempt
+
+    # Session stream: all recordings of the session in one memory-mapped WAV plus an index CSV,
+    # instead of one WAV per attempt (export per-take WAVs with python -m vowel_task.stream)
+    session_stream: bool = False
+    stream_dtype: str = "int16"     # or "float32"
+
+    # Takes (and int16 session streams, once the session ends) stored as "wav" or lossless "flac"
+    storage_codec: str = "wav"
+
+    data_root: str = "../data"
+    startup_report: bool = True     # print where the time to the first screen went
+
+    def save_dir(self, pid):
+        return f"{self.data_root}/subj_{pid}/{self.language}"
+
+    def min_dur(self, vlen):
+        return self.min_dur_long_s if vlen == "long" else self.min_dur_short_s
+
+    def max_rec(self, vlen):
+        return self.max_rec_long_s if vlen == "long" else self.max_rec_short_s
+
+    def take_ext(self):
+        return CODECS[self.storage_codec]
+
+    def vad_params(self):
+        """Keyword arguments for StreamingVAD / detect_active_segments / active_stats."""
+        return dict(frame_ms=self.frame_ms, hangover_ms=self.hangover_ms,
+                    z=self.activity_zscore, abs_floor=self.abs_floor)
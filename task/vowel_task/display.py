@@ -0,0 +1,93 @@
+"""PsychoPy window and text helpers."""
+
+import time
+from collections import OrderedDict
+from psychopy import prefs
+prefs.hardware['audioLib'] = ['ptb']
+from psychopy import visual, event, clock, logging
+from psychopy.hardware import keyboard
+
+
+def open_window():
+    kb = keyboard.Keyboard()
+    win = visual.Window(
+        fullscr = True,
+        size = [1920, 1200],
+        screen = -1,
+        pos = (0, 0),
+        units = "pix",
+        allowGUI = False,
+        winType = 'glfw',
+        color=[-0.5, -0.5, -0.5])
+    return win, kb
+
+
+def red_dot(win):
+    return visual.Circle(win=win, radius=10, fillColor=[1, -1, -1], lineColor=None)
+
+
+class StimulusCache:
+    """
+    TextStims built once, up front: every string passed in `texts` (instructions, word prompts,
+    feedback) is rasterised at session start instead of inside the trial loop. Any other string
+    is served from a small LRU pool whose least-recently-used stim is re-texted rather than
+    reallocated. release() frees the GL textures when the session ends.
+    """
+
+    def __init__(self, win, texts=(), pool_size=8):
+        self.win = win
+        self.pool_size = pool_size
+        self._fixed = {t: visual.TextStim(win, t) for t in dict.fromkeys(texts)}
+        self._pool = OrderedDict()
+
+    def __len__(self):
+        return len(self._fixed) + len(self._pool)
+
+    def get(self, text):
+        stim = self._fixed.get(text)
+        if stim is not None:
+            return stim
+        stim = self._pool.pop(text, None)
+        if stim is None:
+            if len(self._pool) >= self.pool_size:
+                _, stim = self._pool.popitem(last=False)
+                stim.text = text
+            else:
+                stim = visual.TextStim(self.win, text)
+        self._pool[text] = stim
+        return stim
+
+    def release(self):
+        for stim in list(self._fixed.values()) + list(self._pool.values()):
+            clear = getattr(stim, "clearTextures", None)
+            if clear is not None:
+                clear()
+        self._fixed.clear()
+        self._pool.clear()
+
+
+def to_perf(t):
+    """A psychopy.clock.getTime() time (flip and key timestamps) on the perf_counter clock of AttemptTimer."""
+    return t + (time.perf_counter() - clock.getTime())
+
+
+def flip(win):
+    """win.flip(), returning the flip timestamp PsychoPy reports (after the vertical blank) as a perf_counter time."""
+    t = win.flip()
+    return to_perf(t + logging.defaultClock.getLastResetTime())
+
+
+def display_text(win, kb, text, stims=None):
+    """
+    Show text until SPACE, using the prebuilt stim from `stims` (a StimulusCache) if given.
+    Returns the perf_counter times of the flip that showed it and of the key going down.
+    """
+    print(text)
+    textstim = stims.get(text) if stims is not None else visual.TextStim(win, text)
+    event.clearEvents(eventType = None)
+    textstim.draw()
+    t_flip = flip(win)
+    keys = kb.waitKeys(keyList = ['space'])
+    t_key = to_perf(keys[0].tDown)
+    win.flip()
+    return t_flip, t_key
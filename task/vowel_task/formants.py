@@ -0,0 +1,116 @@
+"""
+Quick LPC formant estimate for live feedback, and the per-vowel targets it is checked against.
+NumPy only (the task doesn't have to import SciPy), so the analysis scripts can benchmark it against Praat.
+"""
+
+import csv, math
+import numpy as np
+
+FORMANT_COLUMNS = ["F1_Hz", "F2_Hz", "formant_z", "off_target"]
+
+
+def levinson(r, order):
+    """
+    LPC coefficients [1, a1, ..., a_order] for every row of the autocorrelations r (frames, >= order+1),
+    by the Levinson-Durbin recursion run over all frames at once.
+    """
+    n = r.shape[0]
+    a = np.zeros((n, order + 1))
+    a[:, 0] = 1.0
+    err = r[:, 0].copy()
+    for i in range(1, order + 1):
+        k = -(a[:, :i] * r[:, i:0:-1]).sum(axis=1) / np.where(err > 0, err, np.inf)
+        a[:, 1:i + 1] = a[:, 1:i + 1] + k[:, None] * a[:, i - 1::-1][:, :i]
+        err *= 1.0 - k * k
+    return a
+
+
+def resample(x, sr, fs):
+    """
+    x from sr to fs by FFT (band-limited, like scipy.signal.resample), cut to a whole number of
+    resampling periods so the new rate is exact. Edges wrap around, so keep a margin.
+    """
+    step = sr // math.gcd(sr, fs)
+    x = x[:len(x) // step * step]
+    n = len(x) * fs // sr
+    spec = np.fft.rfft(x)[:n // 2 + 1]
+    return np.fft.irfft(spec, n) * (n / max(len(x), 1))
+
+
+def lpc_formants(x, sr, center=None, n_frames=5, hop_s=0.005, win_s=0.025, max_formant_hz=5500,
+                 n_formants=5, preemph_hz=50, max_bw_hz=None):
+    """
+    (F1, F2) in Hz around sample `center` of x (default: the middle), NaN where none is found.
+
+    Like Praat's Burg analysis: resample to 2 * max_formant_hz, pre-emphasise from preemph_hz,
+    2 * n_formants LPC poles per Gaussian-windowed frame. n_frames frames hop_s apart are analysed in
+    one batch (FFT autocorrelation, vectorised Levinson, eigenvalues of the stacked companion
+    matrices) and the per-frame estimates are medianed. Only the samples around the centre are used.
+    Poles are numbered as Praat numbers them (so they compare with exemplar targets measured in
+    Praat); max_bw_hz skips broader ones, which Praat would count as formants.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    center = len(x) // 2 if center is None else int(center)
+    fs = int(2 * max_formant_hz)
+    span = int((2 * win_s + (n_frames - 1) * hop_s + 0.02) * sr / 2)  # + 10 ms each side for the resampling
+    seg = x[max(0, center - span):center + span]
+    y = resample(seg, sr, fs)
+    a = math.exp(-2 * math.pi * preemph_hz / fs)
+    y = np.append(y[0], y[1:] - a * y[:-1])
+
+    win = int(round(2 * win_s * fs))            # Praat's window is twice the effective length
+    hop = int(round(hop_s * fs))
+    mid = int((center - max(0, center - span)) * fs / sr)
+    starts = mid - win // 2 + hop * (np.arange(n_frames) - (n_frames - 1) // 2)
+    starts = starts[(starts >= 0) & (starts + win <= len(y))]
+    if starts.size == 0:
+        return math.nan, math.nan
+    frames = np.lib.stride_tricks.sliding_window_view(y, win)[starts]
+    t = (np.arange(win) - (win - 1) / 2) / (win + 1)
+    frames = frames * (np.exp(-48.0 * t * t) - math.exp(-12.0)) / (1 - math.exp(-12.0))   # Praat's Gaussian
+
+    order = 2 * n_formants
+    spec = np.fft.rfft(frames, 2 * win, axis=1)
+    r = np.fft.irfft(spec.real ** 2 + spec.imag ** 2, axis=1)[:, :order + 1]
+    r[:, 0] *= 1.0 + 1e-9                                                 # keep it well conditioned
+    coef = levinson(r, order)
+
+    companion = np.zeros((len(coef), order, order))
+    companion[:, 0, :] = -coef[:, 1:]
+    companion[:, np.arange(1, order), np.arange(order - 1)] = 1.0
+    roots = np.linalg.eigvals(companion)
+
+    freq = np.angle(roots) * fs / (2 * np.pi)
+    bw = -np.log(np.maximum(np.abs(roots), 1e-12)) * fs / np.pi
+    ok = (roots.imag > 0) & (freq > 50) & (freq < fs / 2 - 50)
+    if max_bw_hz is not None:
+        ok &= bw < max_bw_hz
+    freq = np.sort(np.where(ok, freq, np.inf), axis=1)
+    f1 = freq[:, 0]
+    f2 = freq[:, 1]
+    f1 = np.median(f1[np.isfinite(f1)]) if np.isfinite(f1).any() else math.nan
+    f2 = np.median(f2[np.isfinite(f2)]) if np.isfinite(f2).any() else math.nan
+    return float(f1), float(f2)
+
+
+class FormantTargets:
+    """
+    Per-vowel F1/F2 means and standard deviations (CSV: vowel, F1_mean, F1_sd, F2_mean, F2_sd, as
+    written by analysis/exemplars.py --targets). check() gives the distance of a take from its
+    vowel's target in standard deviations and whether that is beyond max_z.
+    """
+
+    def __init__(self, path, max_z=2.5):
+        self.max_z = max_z
+        self.targets = {}
+        with open(path, newline="", encoding="utf-8") as f:
+            for rec in csv.DictReader(f):
+                self.targets[rec["vowel"]] = tuple(float(rec[k]) for k in ("F1_mean", "F1_sd", "F2_mean", "F2_sd"))
+
+    def check(self, vowel, f1, f2):
+        """(z, off_target); (nan, False) for unknown vowels or missing formants."""
+        t = self.targets.get(vowel)
+        if t is None or math.isnan(f1) or math.isnan(f2):
+            return math.nan, False
+        z = math.hypot((f1 - t[0]) / t[1], (f2 - t[2]) / t[3])
+        return z, z > self.max_z
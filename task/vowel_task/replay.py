@@ -0,0 +1,229 @@
+"""
+Headless replay of the take pipeline: session WAVs, session streams (or synthetic signals) go
+through the same streaming VAD, trim and pass/fail code as a live take, without a microphone or
+a window.
+
+    python -m vowel_task.replay ../data/subj_101/arabic          # every session log in there
+    python -m vowel_task.replay --synthetic 200 --repeat 3
+
+Prints takes/sec, per-stage latency percentiles and peak memory per stage, and checks each
+replayed decision against the `passed` column of its log. Exits 1 on a decision mismatch.
+"""
+
+import io, os, csv, sys, glob, time, argparse, statistics, tracemalloc
+from collections import defaultdict
+import numpy as np
+import soundfile as sf
+from .config import CODECS, TaskConfig
+from .vad import StreamingVAD, judge_take
+from .stream import StreamReader, stream_for_log
+
+STAGES = ("decode", "stream_vad", "analyze", "encode")
+BLOCK = 480                     # samples per simulated input callback (10 ms at 48 kHz)
+
+
+class Take:
+    """One take to replay, with the thresholds it was judged against and the logged outcome."""
+
+    def __init__(self, name, min_dur, min_rms, path=None, x=None, sr=None, logged=None, stream=None):
+        self.name = name
+        self.min_dur = min_dur
+        self.min_rms = min_rms
+        self.path = path
+        self.x = x
+        self.sr = sr
+        self.stream = stream    # StreamReader holding the whole recording under `name`
+        self.logged = logged    # (active_duration_s, active_rms, passed) from the log, or expected
+
+
+def find_saved(rec_path, log):
+    """
+    The file a log row points at: rec_path, else the same name next to the log; either one with
+    any storage codec's extension (takes converted to FLAC after the session still have .wav logged).
+    """
+    stem = os.path.splitext(rec_path)[0]
+    for base in (stem, os.path.join(os.path.dirname(log), os.path.basename(stem))):
+        for ext in CODECS.values():
+            if os.path.exists(base + ext):
+                return base + ext
+    return rec_path
+
+
+def logged_takes(paths):
+    """
+    Takes from session logs (or directories of them). A session recorded as a stream is read from
+    the stream next to its log (whole recordings, as they were scored live); otherwise files are
+    looked up next to their log. Returns (takes, log rows whose audio was not found).
+    """
+    logs = []
+    for p in paths:
+        logs += sorted(glob.glob(os.path.join(p, "*_vowels_*.csv"))) if os.path.isdir(p) else [p]
+    takes = []
+    missing = []
+    for log in logs:
+        stream = stream_for_log(log)
+        reader = StreamReader(stream) if stream is not None else None
+        with open(log, newline="", encoding="utf-8") as f:
+            for rec in csv.DictReader(f):
+                logged = (float(rec["active_duration_s"]), float(rec["active_rms"]), rec["passed"] == "1")
+                name = os.path.basename(rec["rec_path"])
+                if reader is not None and name in reader:
+                    take = Take(name, float(rec["min_dur_s"]), float(rec["min_rms"]), sr=reader.sr,
+                                logged=logged, stream=reader)
+                else:
+                    wav = find_saved(rec["rec_path"], log)
+                    if not os.path.exists(wav):
+                        missing.append(rec["rec_path"])
+                        continue
+                    take = Take(os.path.basename(wav), float(rec["min_dur_s"]), float(rec["min_rms"]),
+                                path=wav, logged=logged)
+                takes.append(take)
+    return takes, missing
+
+
+def synthetic_takes(n, cfg, seed=0):
+    """
+    Silence, quiet noise and loud tones of random length in noise, judged with cfg's long-vowel
+    thresholds. Silence and noise below abs_floor must fail; tones have no expected outcome (a
+    steady tone that fills most of the trimmed take sits below its own z-threshold, unlike speech).
+    """
+    rng = np.random.default_rng(seed)
+    sr = cfg.sample_rate
+    min_dur = cfg.min_dur("long")
+    takes = []
+    for i in range(n):
+        kind = ("silence", "noise", "tone")[i % 3]
+        x = (rng.standard_normal(int(cfg.max_rec("long") * sr)) * 0.002).astype(np.float32)
+        expected = False
+        if kind == "silence":
+            x[:] = 0
+        elif kind == "tone":
+            dur = rng.uniform(0.03, 0.8)
+            s = int(rng.uniform(0.1, 0.5) * sr)
+            t = np.arange(min(int(dur * sr), len(x) - s)) / sr
+            x[s:s + len(t)] += (0.2 * np.sin(2 * np.pi * rng.uniform(100, 300) * t)).astype(np.float32)
+            expected = None
+        logged = None if expected is None else (np.nan, np.nan, expected)
+        takes.append(Take(f"{kind}-{i:04d}", min_dur, cfg.min_active_rms, x=x, sr=sr, logged=logged))
+    return takes
+
+
+def replay_take(take, cfg, block=BLOCK, stamp=None):
+    """
+    One take through the pipeline, calling stamp(stage) after each stage. The take is fed to a
+    StreamingVAD in `block`-sized pieces as record_take does, then trimmed and judged exactly like
+    a live take; a saved WAV is also judged as it is (that is what the log recorded), untimed. A
+    take from a session stream is the whole recording, so the replayed decision is the saved one.
+    Returns (replayed, saved): (active_duration_s, active_rms, passed) for each.
+    """
+    stamp = stamp or (lambda stage: None)
+    if take.stream is not None:
+        x, sr = take.stream.take_float(take.name, full=True), take.sr
+    elif take.path is not None:
+        x, sr = sf.read(take.path, dtype="float32", always_2d=True)
+        x = x[:, 0]
+    else:
+        x, sr = take.x, take.sr
+    stamp("decode")
+
+    vad = StreamingVAD(sr, **cfg.vad_params())
+    for i in range(0, len(x), block):
+        vad.process(x[i:i + block])
+    stamp("stream_vad")
+
+    start, end, act_dur_s, act_rms = vad.analyze(x)
+    replayed = act_dur_s, act_rms, (act_dur_s >= take.min_dur) and (act_rms >= take.min_rms)
+    stamp("analyze")
+
+    sf.write(io.BytesIO(), x[start:end], sr, subtype="PCM_16", format=cfg.storage_codec.upper())
+    stamp("encode")
+
+    saved = replayed if take.path is None else judge_take(x, sr, take.min_dur, take.min_rms, **cfg.vad_params())
+    return replayed, saved
+
+
+def run(takes, cfg, block=BLOCK, repeat=1, memory=True):
+    """
+    Replays every take `repeat` times. Returns (stage latencies, peak bytes each stage allocated
+    on top of what was live when it started, elapsed seconds, decision mismatches).
+    """
+    lat = defaultdict(list)
+    mismatches = []
+    t_start = time.perf_counter()
+    for r in range(repeat):
+        for take in takes:
+            t = [time.perf_counter()]
+
+            def stamp(stage):
+                now = time.perf_counter()
+                lat[stage].append(now - t[0])
+                t[0] = now
+
+            _, saved = replay_take(take, cfg, block, stamp)
+            if r == 0 and take.logged is not None and saved[2] != take.logged[2]:
+                mismatches.append((take, saved))
+    elapsed = time.perf_counter() - t_start
+
+    # memory in a separate pass: tracemalloc slows everything down
+    peak = defaultdict(int)
+    if memory:
+        tracemalloc.start()
+        for take in takes:
+            tracemalloc.reset_peak()
+            base = [tracemalloc.get_traced_memory()[0]]
+
+            def stamp(stage):
+                current, top = tracemalloc.get_traced_memory()
+                peak[stage] = max(peak[stage], top - base[0])
+                base[0] = current
+                tracemalloc.reset_peak()
+
+            replay_take(take, cfg, block, stamp)
+        tracemalloc.stop()
+    return lat, peak, elapsed, mismatches
+
+
+def report(lat, peak, elapsed, n_takes, file=None):
+    file = file or sys.stdout
+    print(f"{n_takes} takes in {elapsed:.2f} s: {n_takes / elapsed:.1f} takes/sec", file=file)
+    print(f"  {'stage':<12} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'peak KiB':>9}", file=file)
+    for stage in STAGES:
+        d = lat[stage]
+        q = statistics.quantiles(d, n=100, method="inclusive") if len(d) > 1 else d * 99
+        ms = [v * 1000 for v in (q[49], q[89], q[98], max(d))]
+        mem = f"{peak[stage] / 1024:9.1f}" if stage in peak else f"{'-':>9}"
+        print(f"  {stage:<12}" + "".join(f" {v:8.3f}" for v in ms) + f" {mem}", file=file)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Replay takes through the task's VAD and pass/fail rule.")
+    parser.add_argument("logs", nargs="*", help="session log CSVs, or directories containing them")
+    parser.add_argument("--synthetic", type=int, default=0, metavar="N",
+                        help="also replay N synthetic silence/noise/tone takes")
+    parser.add_argument("--block", type=int, default=BLOCK, help="samples per simulated callback (default %(default)s)")
+    parser.add_argument("--repeat", type=int, default=1, help="timing passes over the takes (default %(default)s)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--codec", choices=sorted(CODECS), default="wav", help="encoder to time (default %(default)s)")
+    args = parser.parse_args()
+
+    cfg = TaskConfig(language="replay", storage_codec=args.codec)
+    takes, missing = logged_takes(args.logs)
+    if missing:
+        print(f"Skipped {len(missing)} logged take(s) with no audio file or session stream, e.g. {missing[0]}",
+              file=sys.stderr)
+    takes += synthetic_takes(args.synthetic, cfg)
+    if not takes:
+        parser.error("nothing to replay: give session logs and/or --synthetic N")
+
+    lat, peak, elapsed, mismatches = run(takes, cfg, args.block, args.repeat, not args.no_memory)
+    report(lat, peak, elapsed, len(takes) * args.repeat)
+
+    checked = sum(t.logged is not None for t in takes)
+    print(f"Decisions: {checked - len(mismatches)}/{checked} match the log / expected outcome")
+    for take, (dur, rms, passed) in mismatches:
+        print(f"  MISMATCH {take.name}: replayed passed={int(passed)} (dur {dur:.4f} s, rms {rms:.4f}), "
+              f"logged passed={int(take.logged[2])} (dur {take.logged[0]:.4f} s, rms {take.logged[1]:.4f}) "
+              f"against min_dur {take.min_dur:.3f} s, min_rms {take.min_rms:.3f}", file=sys.stderr)
+    if mismatches:
+        sys.exit(1)
@@ -0,0 +1,206 @@
+"""
+Re-score every saved take under a data root against a grid of VAD and pass/fail settings.
+
+    python -m vowel_task.rescore ../data --z 0.3,0.5,0.8 --min-dur-scale 0.8,1,1.2
+
+Each WAV is read once (memory-mapped when it is plain 16-bit PCM or float) and framed once per frame size;
+sessions recorded as a stream are read through the stream (one job per stream, each take trimmed as it
+was saved and scored live, the samples a per-take WAV holds; exported copies of their takes skipped);
+every (hangover, z, abs_floor) combination reuses those frame energies, and the duration/RMS
+thresholds are applied to the resulting statistics afterwards. Those thresholds are the ones each
+take was judged against live (min_dur_s/min_rms in its session log, so per language and vowel
+length), times the scale factors of the grid. The output is one row per setting, language and
+vowel length with the number and share of takes that would have passed.
+"""
+
+import os, re, csv, sys, glob, argparse, itertools
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from .config import CODECS, TaskConfig
+from .vad import frame_rms, segments_from_frames, segment_stats
+from .stream import StreamReader, find_streams, one_per_stem, wav_memmap
+
+TAKE_RE = re.compile(r"_(?P<vlen>short|long)_try\d+$")
+VAD_AXES = ("frame_ms", "hangover_ms", "z", "abs_floor")
+DECISION_AXES = ("min_dur_scale", "min_rms_scale")
+
+
+def read_take(path):
+    mm = wav_memmap(path)
+    if mm is not None:
+        samples, sr = mm
+        if samples.dtype == np.int16:
+            return samples.astype(np.float32) / 32768.0, sr      # same scaling as soundfile
+        return np.asarray(samples), sr
+    import soundfile as sf
+    x, sr = sf.read(path, dtype="float32", always_2d=True)
+    return x[:, 0], sr
+
+
+def take_stats(path, vad_grid):
+    """
+    (active_duration_s, active_rms) of one take for every VAD setting in vad_grid, as a
+    (len(vad_grid), 2) array: what active_stats returns for those parameters.
+    """
+    return grid_stats(*read_take(path), vad_grid)
+
+
+def stream_stats(path, names, vad_grid):
+    """take_stats for the named takes of one session stream, each trimmed as the live task trimmed it."""
+    reader = StreamReader(path)
+    return [grid_stats(reader.take_float(name), reader.sr, vad_grid) for name in names]
+
+
+def grid_stats(x, sr, vad_grid):
+    n = len(x)
+    frames = {}
+    out = np.zeros((len(vad_grid), 2))
+    for i, (frame_ms, hangover_ms, z, abs_floor) in enumerate(vad_grid):
+        frame_len = max(1, int(sr * frame_ms / 1000.0))
+        if frame_len not in frames:
+            frames[frame_len] = frame_rms(x, frame_len)
+        hang_frames = max(1, int(hangover_ms / frame_ms))
+        segs = segments_from_frames(frames[frame_len], n, frame_len, hang_frames, z, abs_floor)
+        out[i] = segment_stats(x, frames[frame_len], segs, frame_len, sr)
+    return out
+
+
+def logged_thresholds(lang_dir):
+    """{take name without extension: (min_dur_s, min_rms)} from the session logs in lang_dir."""
+    out = {}
+    for log in sorted(glob.glob(os.path.join(lang_dir, "*_vowels_*.csv"))):
+        with open(log, newline="", encoding="utf-8") as f:
+            for rec in csv.DictReader(f):
+                try:
+                    out[os.path.splitext(os.path.basename(rec["rec_path"]))[0]] = (float(rec["min_dur_s"]),
+                                                                                  float(rec["min_rms"]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+    return out
+
+
+def find_takes(root):
+    """
+    (path, language, vlen, min_dur_s, min_rms) for every take file (WAV or FLAC) under
+    root/subj_*/<language>/, {stream path: [(name, language, vlen, min_dur_s, min_rms), ...]} for
+    the takes in session streams there, and the names of takes left out for want of thresholds.
+    Take files named in a stream's index (exported copies) are left out, and a take kept as both
+    WAV and FLAC is counted once. The thresholds are the ones logged for the take; a take without
+    a log row (older logs only have final attempts) gets the ones most often logged for its
+    language and vowel length under root.
+    """
+    found = []
+    by_group = {}
+    for lang_dir in sorted(glob.glob(os.path.join(root, "subj_*", "*"))):
+        language = os.path.basename(lang_dir)
+        logged = logged_thresholds(lang_dir)
+        in_streams = set()
+        candidates = []
+        for stream in find_streams(lang_dir):
+            for t in StreamReader(stream).takes:
+                candidates.append((stream, t["name"]))
+                in_streams.add(os.path.splitext(t["name"])[0])
+        files = [p for p in glob.glob(os.path.join(lang_dir, "*.*"))
+                 if os.path.splitext(p)[1].lower() in CODECS.values()]
+        candidates += [(None, p) for p in one_per_stem(files)
+                       if os.path.splitext(os.path.basename(p))[0] not in in_streams]
+        for stream, name in candidates:
+            stem = os.path.splitext(os.path.basename(name))[0]
+            m = TAKE_RE.search(stem)
+            if m is None:
+                continue
+            found.append((stream, name, language, m["vlen"], logged.get(stem)))
+            if stem in logged:
+                by_group.setdefault((language, m["vlen"]), Counter())[logged[stem]] += 1
+
+    takes = []
+    streams = {}
+    unlogged = []
+    for stream, name, language, vlen, thresholds in found:
+        if thresholds is None and (language, vlen) in by_group:
+            thresholds = by_group[language, vlen].most_common(1)[0][0]
+        if thresholds is None:
+            unlogged.append(name)
+        elif stream is None:
+            takes.append((name, language, vlen, *thresholds))
+        else:
+            streams.setdefault(stream, []).append((name, language, vlen, *thresholds))
+    return takes, streams, unlogged
+
+
+def acceptance_table(takes, stats, vad_grid, decision_grid):
+    """
+    One row per (VAD setting, decision setting, language, vlen) with the median thresholds applied
+    (each take's logged ones times the setting's scales), n_takes, n_passed and pass_rate.
+    """
+    groups = pd.DataFrame({"language": pd.Categorical([t[1] for t in takes]), "vlen": [t[2] for t in takes]})
+    base_dur = np.array([t[3] for t in takes])
+    base_rms = np.array([t[4] for t in takes])
+    rows = []
+    for dur_scale, rms_scale in decision_grid:
+        min_dur = base_dur * dur_scale
+        min_rms = base_rms * rms_scale
+        passed = (stats[:, :, 0] >= min_dur[:, None]) & (stats[:, :, 1] >= min_rms[:, None])   # (takes, vad settings)
+        for i, vad in enumerate(vad_grid):
+            g = groups.assign(passed=passed[:, i], min_dur_s=min_dur, min_rms=min_rms).groupby(
+                ["language", "vlen"], observed=True)
+            counts = g.agg(min_dur_s=("min_dur_s", "median"), min_rms=("min_rms", "median"),
+                           size=("passed", "size"), sum=("passed", "sum")).reset_index()
+            for rec in counts.itertuples(index=False):
+                rows.append((*vad, dur_scale, rms_scale, rec.language, rec.vlen, rec.min_dur_s, rec.min_rms,
+                             rec.size, int(rec.sum), rec.sum / rec.size))
+    return pd.DataFrame(rows, columns=[*VAD_AXES, *DECISION_AXES, "language", "vlen", "min_dur_s", "min_rms",
+                                       "n_takes", "n_passed", "pass_rate"])
+
+
+def grid_arg(text, kind=float):
+    return [kind(v) for v in text.split(",") if v]
+
+
+if __name__ == "__main__":
+
+    cfg = TaskConfig(language="rescore")
+    parser = argparse.ArgumentParser(description="Re-score saved takes against a grid of VAD/threshold settings.")
+    parser.add_argument("root", nargs="?", default=cfg.data_root, help="data root with subj_*/ (default %(default)s)")
+    parser.add_argument("--frame-ms", default=str(cfg.frame_ms), help="comma-separated grid (default %(default)s)")
+    parser.add_argument("--hangover-ms", default=str(cfg.hangover_ms))
+    parser.add_argument("--z", default=str(cfg.activity_zscore))
+    parser.add_argument("--abs-floor", default=str(cfg.abs_floor))
+    parser.add_argument("--min-dur-scale", default="1",
+                        help="min_dur relative to each take's logged one (per language and vowel length)")
+    parser.add_argument("--min-rms-scale", default="1", help="min_rms relative to each take's logged one")
+    parser.add_argument("--jobs", type=int, default=0, help="worker processes (0 = all cores)")
+    parser.add_argument("--out", default="rescore-acceptance.csv", help="acceptance table (default %(default)s)")
+    args = parser.parse_args()
+
+    vad_grid = list(itertools.product(grid_arg(args.frame_ms, int), grid_arg(args.hangover_ms, int),
+                                      grid_arg(args.z), grid_arg(args.abs_floor)))
+    decision_grid = list(itertools.product(grid_arg(args.min_dur_scale), grid_arg(args.min_rms_scale)))
+    takes, streams, unlogged = find_takes(args.root)
+    if unlogged:
+        print(f"{len(unlogged)} take(s) left out: no thresholds logged for their language and vowel length",
+              file=sys.stderr)
+    stream_names = {s: [t[0] for t in ts] for s, ts in streams.items()}
+    takes_in_streams = [t for ts in streams.values() for t in ts]
+    if not takes and not takes_in_streams:
+        sys.exit(f"No takes found under {args.root}/subj_*/<language>/")
+
+    paths = [t[0] for t in takes]
+    jobs = args.jobs or os.cpu_count()
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            stats = list(pool.map(take_stats, paths, itertools.repeat(vad_grid),
+                                  chunksize=max(1, len(paths) // (4 * jobs))))
+            for per_stream in pool.map(stream_stats, stream_names, stream_names.values(), itertools.repeat(vad_grid)):
+                stats += per_stream
+    else:
+        stats = [take_stats(p, vad_grid) for p in paths]
+        for s, names in stream_names.items():
+            stats += stream_stats(s, names, vad_grid)
+    takes += takes_in_streams
+
+    table = acceptance_table(takes, np.stack(stats), vad_grid, decision_grid)
+    table.to_csv(args.out, index=False)
+    print(f"Re-scored {len(takes)} takes under {len(vad_grid) * len(decision_grid)} setting(s) -> {args.out}")
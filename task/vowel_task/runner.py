@@ -0,0 +1,210 @@
+"""The trial loop shared by the task entry points."""
+
+import os, csv, math, time, random
+from datetime import datetime
+from .session import LOG_COLUMNS, SessionLogger
+from .startup import StartupTimer
+from .timing import TIMING_COLUMNS, AttemptTimer, AllocCounter
+from .formants import FORMANT_COLUMNS, FormantTargets, lpc_formants
+from .stream import SessionStream
+
+FEEDBACK = "Your recording was too {reason}, please try again.\n\n Press SPACE to retry."
+GOODBYE = "All done. Thank you! Press space one more time to exit the program. Your experimenter will be with you shortly."
+
+# the audio stack and PsychoPy are imported inside run_task(), timed, and only once the
+# participant ID is in and the input device has been checked
+
+
+def load_items(cfg):
+    """Word list (dicts) with each word `repeats` times, the whole list shuffled."""
+    with open(cfg.words_csv, newline="", encoding="utf-8") as f:
+        items = [item for item in csv.DictReader(f) for _ in range(cfg.repeats)]
+    random.shuffle(items)
+    return items
+
+
+def prompt_text(word):
+    return f"{word}\n\n"
+
+
+def session_texts(cfg, items):
+    """Every string the session can show, for the stimulus cache."""
+    texts = [cfg.welcome, cfg.instructions]
+    texts += [prompt_text(item["word"]) for item in items]
+    texts += [FEEDBACK.format(reason=r) for r in ("short", "quiet")]
+    return [t for t in texts + [GOODBYE] if t]
+
+
+def run_task(pid, cfg):
+    """Whole session for one participant: instructions, every item with retries, wrap-up."""
+    timer = StartupTimer()
+    save_dir = cfg.save_dir(pid)
+    os.makedirs(save_dir, exist_ok=True)
+
+    # Microphone first: a wrong device fails here, before the slow GUI start
+    audio = timer.imp("vowel_task.audio")
+    with timer.phase("check input device"):
+        audio.setup_input(cfg)
+    with timer.phase("read word list"):
+        items = load_items(cfg)
+    targets = None
+    if cfg.live_formants and cfg.formant_targets_csv:
+        with timer.phase("read formant targets"):
+            targets = FormantTargets(cfg.formant_targets_csv, cfg.formant_max_z)
+
+    # PsychoPy window
+    display = timer.imp("vowel_task.display")
+    core = timer.imp("psychopy.core")
+    with timer.phase("open window"):
+        win, kb = display.open_window()
+        dot = display.red_dot(win)
+    with timer.phase("prebuild stimuli"):
+        stims = display.StimulusCache(win, session_texts(cfg, items))
+
+    # Log file
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    log_path = os.path.join(save_dir, f"{pid}_{cfg.language}_vowels_{stamp}.csv")
+    log = SessionLogger(log_path, LOG_COLUMNS + TIMING_COLUMNS + FORMANT_COLUMNS, fsync_every=cfg.log_fsync_every)
+    timing = AttemptTimer()
+
+    # Recordings go into one session stream, or into per-attempt WAVs written on a background
+    # thread; either way from recording buffers that are reused once stored
+    max_rec_s = max(cfg.max_rec_short_s, cfg.max_rec_long_s)
+    pool = audio.BufferPool(int(max_rec_s * cfg.sample_rate), cfg.channels, cfg.buffer_pool)
+    stream = wav_writer = None
+    if cfg.session_stream:
+        stream = SessionStream(os.path.join(save_dir, f"{pid}_{cfg.language}_stream_{stamp}.wav"), cfg.sample_rate,
+                               cfg.stream_dtype, capacity_s=len(items) * cfg.max_retries_per_item * max_rec_s,
+                               fsync_every=cfg.log_fsync_every, codec=cfg.storage_codec)
+    else:
+        wav_writer = audio.WavWriter()
+    alloc = AllocCounter() if cfg.debug_alloc else None
+    if cfg.startup_report:
+        timer.report()
+
+    # Instructions
+    for text in (cfg.welcome, cfg.instructions):
+        if text:
+            display.display_text(win, kb, text, stims)
+
+    for index, item in enumerate(items):
+        trial_idx = index + 1
+        word = item["word"]
+        vowel = item["vowel"]
+        vlen = item["vlen"]
+        min_dur = cfg.min_dur(vlen)
+
+        retries = 0
+        passed = False
+
+        while retries < cfg.max_retries_per_item and not passed:
+            timing.start()
+            if alloc is not None:
+                alloc.start()
+
+            # Prompt
+            t_flip, t_key = display.display_text(win, kb, prompt_text(word), stims)
+            timing.mark("prompt_flip", t_flip)
+            timing.mark("keypress", t_key)
+
+            # Display dot
+            dot.draw()
+            timing.mark("dot_flip", display.flip(win))
+
+            # Record (streams until sustained silence after speech, capped at the window)
+            buf = pool.acquire()
+            x, start, end, act_dur_s, act_rms, passed = audio.run_take(cfg, vlen, timing, out=buf)
+            x_trim = x[start:end]
+
+            # End recording
+            win.flip()
+
+            # Save the take (in stream mode rec_path is where exporting the stream puts its file)
+            wav_name = f"{pid}_{cfg.language}_{trial_idx:03d}_{word}_{vowel}_{vlen}_try{retries}{cfg.take_ext()}"
+            rec_path = os.path.join(save_dir, wav_name)
+            if stream is not None:
+                stream.write(wav_name, trial_idx, retries, x, start, end)
+            else:
+                wav_writer.submit(rec_path, x_trim, cfg.sample_rate, done=lambda buf=buf: pool.release(buf))
+            timing.mark("wav_queued")
+
+            # Live formant check (console only; does not change pass/fail)
+            f1 = f2 = z = math.nan
+            off_target = False
+            if cfg.live_formants and act_dur_s > 0:
+                t_f = time.perf_counter()
+                f1, f2 = lpc_formants(x_trim, cfg.sample_rate)
+                if targets is not None:
+                    z, off_target = targets.check(vowel, f1, f2)
+                timing.add_duration("formants", time.perf_counter() - t_f)
+                if off_target:
+                    print(f"Off target: {word} /{vowel}/ F1 {f1:.0f} Hz, F2 {f2:.0f} Hz ({z:.1f} SD from target)")
+            if stream is not None:
+                pool.release(buf)       # copied into the stream
+
+            # Log every attempt; the last one for this item is flagged final
+            retries_used = retries if passed else retries + 1
+            t_log = time.perf_counter()
+            timing.mark("log", t_log)
+            log.log([
+                pid,
+                datetime.now().isoformat(timespec="seconds"),
+                cfg.language,
+                trial_idx,
+                word,
+                vowel,
+                vlen,
+                rec_path,
+                f"{act_dur_s:.4f}",
+                f"{act_rms:.4f}",
+                int(passed),
+                retries_used,
+                cfg.sample_rate,
+                cfg.channels,
+                f"{min_dur:.3f}",
+                f"{cfg.min_active_rms:.3f}",
+                retries,
+                int(passed or retries_used >= cfg.max_retries_per_item),
+                *timing.columns(),
+                *("" if math.isnan(v) else f"{v:.1f}" for v in (f1, f2)),
+                "" if math.isnan(z) else f"{z:.2f}",
+                int(off_target)
+            ])
+            timing.add_duration("log write", time.perf_counter() - t_log)
+            if alloc is not None:
+                alloc.stop()
+
+            # Feedback
+            if passed:
+                core.wait(1)
+                continue
+            else:
+                if act_dur_s < min_dur:
+                    reason = 'short'
+                if act_rms < cfg.min_active_rms:
+                    reason = 'quiet'
+                retries += 1
+                print(f"retries: {retries}")
+                display.display_text(win, kb, FEEDBACK.format(reason=reason), stims)
+
+    # Wrap up
+    if stream is not None:
+        stream.close()
+    else:
+        wav_writer.close()
+        timing.durations["wav write (writer thread)"] = wav_writer.write_s
+    log.close()
+    timing.summary()
+    if pool.grown:
+        print(f"Recording buffer pool grew by {pool.grown} (all {cfg.buffer_pool} were waiting to be written)")
+    if alloc is not None:
+        alloc.summary()
+        alloc.close()
+    display.display_text(win, kb, GOODBYE, stims)
+    stims.release()
+    print(f"Data saved to: {os.path.abspath(save_dir)}\nLog file: {os.path.abspath(log_path)}")
+    if stream is not None:
+        print(f"Session stream: {os.path.abspath(stream.path)}")
+    print("Press any key to exit.")
+    win.close()
+    core.quit()
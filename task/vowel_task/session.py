@@ -0,0 +1,63 @@
+"""Per-attempt session log."""
+
+import os, csv
+
+
+LOG_COLUMNS = [
+    "pid",
+    "timestamp",
+    "language",
+    "trial_index",
+    "word",
+    "vowel",
+    "vlen",
+    "rec_path",
+    "active_duration_s",
+    "active_rms",
+    "passed",
+    "retries_used",
+    "sr",
+    "channels",
+    "min_dur_s",
+    "min_rms",
+    "attempt",
+    "final",
+]
+
+
+class SessionLogger:
+    """
+    Session CSV log, one row per attempt, kept open on a single line-buffered handle for the whole
+    session. Every row reaches the OS as it is written; rows are fsynced to disk every `fsync_every`
+    rows (0 = only on checkpoint()) and on close().
+    """
+
+    def __init__(self, path, columns=LOG_COLUMNS, fsync_every=10):
+        self.path = path
+        self.fsync_every = fsync_every
+        self._pending = 0
+        self._f = open(path, "w", newline="", encoding="utf-8", buffering=1)
+        self._writer = csv.writer(self._f)
+        self._writer.writerow(columns)
+
+    def log(self, row):
+        self._writer.writerow(row)
+        self._pending += 1
+        if self.fsync_every and self._pending >= self.fsync_every:
+            self.checkpoint()
+
+    def checkpoint(self):
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._pending = 0
+
+    def close(self):
+        if not self._f.closed:
+            self.checkpoint()
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
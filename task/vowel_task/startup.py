@@ -0,0 +1,36 @@
+"""Startup timing: which imports and setup steps the wait before the first screen goes to."""
+
+import sys, time, importlib
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """
+    Times named startup phases and imports, and prints them like `python -X importtime`
+    (milliseconds, plus how many modules each import pulled in). Time spent waiting for the
+    experimenter (e.g. typing the participant ID) is not inside any phase, so it is not counted.
+    """
+
+    def __init__(self):
+        self.phases = []      # (name, seconds, new modules)
+
+    @contextmanager
+    def phase(self, name):
+        n_mods = len(sys.modules)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - t0, len(sys.modules) - n_mods))
+
+    def imp(self, module):
+        """Import module (dotted name) as a timed phase and return it."""
+        with self.phase(f"import {module}"):
+            return importlib.import_module(module)
+
+    def report(self, file=None):
+        total = sum(s for _, s, _ in self.phases)
+        print(f"startup: {total * 1000:.0f} ms", file=file or sys.stdout)
+        for name, s, mods in self.phases:
+            extra = f"  (+{mods} modules)" if mods else ""
+            print(f"  {name:<28} {s * 1000:8.1f} ms{extra}", file=file or sys.stdout)
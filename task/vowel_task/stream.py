@@ -0,0 +1,272 @@
+"""
+Session-stream storage: every recording of a session appended to one memory-mapped WAV, with an
+index CSV of where each take is, instead of one small WAV per attempt. An int16 stream can be
+compressed to FLAC when the session ends; it is then decoded into memory to be read.
+
+    python -m vowel_task.stream ../data/subj_101/arabic/101_arabic_stream_20250101_120000.wav
+
+exports the takes of a stream as the per-take files (WAV or FLAC) the task would otherwise have written.
+"""
+
+import os, re, sys, csv, glob, struct, argparse
+import numpy as np
+from .config import CODECS
+from .session import SessionLogger
+
+STREAM_INDEX_COLUMNS = ["name", "trial", "attempt", "start_sample", "end_sample", "trim_start", "trim_end"]
+HEADER_BYTES = 44
+DTYPES = {"int16": (1, np.dtype("<i2")), "float32": (3, np.dtype("<f4"))}   # WAV format tag, sample type
+
+
+STREAM_RE = re.compile(r"_stream_\d{8}_\d{6}$")      # <pid>_<language>_stream_<stamp>, as the runner names them
+
+
+def index_path(path):
+    return os.path.splitext(path)[0] + ".csv"
+
+
+def is_stream(path):
+    """Whether path names a session stream (WAV or FLAC) rather than a take."""
+    stem, ext = os.path.splitext(os.path.basename(path))
+    return ext.lower() in CODECS.values() and STREAM_RE.search(stem) is not None
+
+
+def one_per_stem(paths):
+    """
+    paths with one file per name without extension: where audio was stored under several codecs
+    (converted without deleting the original), the one whose extension comes first in CODECS.
+    """
+    rank = {ext: i for i, ext in enumerate(CODECS.values())}
+    best = {}
+    for p in sorted(paths, key=lambda p: rank.get(os.path.splitext(p)[1].lower(), len(rank)), reverse=True):
+        best[os.path.splitext(p)[0]] = p
+    return sorted(best.values())
+
+
+def find_streams(directory):
+    """Session streams in directory that have their index next to them (one per session)."""
+    return one_per_stem(p for p in glob.glob(os.path.join(directory, "*_stream_*.*"))
+                        if is_stream(p) and os.path.exists(index_path(p)))
+
+
+def stream_for_log(log):
+    """The session stream recorded alongside a session log (<pid>_<language>_vowels_<stamp>.csv), or None."""
+    stem = os.path.splitext(log)[0]
+    head, sep, stamp = stem.rpartition("_vowels_")
+    if not sep:
+        return None
+    for ext in CODECS.values():
+        path = f"{head}_stream_{stamp}{ext}"
+        if os.path.exists(path) and os.path.exists(index_path(path)):
+            return path
+    return None
+
+
+def wav_header(sr, dtype, n_samples):
+    """Canonical 44-byte header of a mono WAV holding n_samples of dtype ('int16' or 'float32')."""
+    tag, dt = DTYPES[dtype]
+    size = n_samples * dt.itemsize
+    return struct.pack("<4sI4s4sIHHIIHH4sI", b"RIFF", 36 + size, b"WAVE", b"fmt ", 16, tag, 1, sr,
+                       sr * dt.itemsize, dt.itemsize, 8 * dt.itemsize, b"data", size)
+
+
+def wav_memmap(path):
+    """
+    (samples, sr) for a mono 16-bit PCM or 32-bit float WAV as a read-only memmap (int16 or
+    float32), or None for anything else.
+    """
+    with open(path, "rb") as f:
+        riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave != b"WAVE":
+            return None
+        fmt = None
+        while True:
+            head = f.read(8)
+            if len(head) < 8:
+                return None
+            cid, size = struct.unpack("<4sI", head)
+            if cid == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", f.read(16))
+                f.seek(size - 16 + (size & 1), os.SEEK_CUR)
+            elif cid == b"data":
+                offset = f.tell()
+                break
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+        size = min(size, os.fstat(f.fileno()).st_size - offset)
+    if fmt is None or fmt[1] != 1:
+        return None
+    if fmt[0] in (1, 0xFFFE) and fmt[5] == 16:
+        dt = DTYPES["int16"][1]
+    elif fmt[0] == 3 and fmt[5] == 32:
+        dt = DTYPES["float32"][1]
+    else:
+        return None
+    return np.memmap(path, dtype=dt, mode="r", offset=offset, shape=(size // dt.itemsize,)), fmt[2]
+
+
+def to_pcm16(x):
+    """float32 samples as int16, rounded and clipped exactly as soundfile writes PCM_16 WAVs."""
+    if x.dtype == np.int16:
+        return x
+    return np.clip(np.floor(x * 32768.0), -32768, 32767).astype(np.int16)
+
+
+def transcode(src, dst):
+    """
+    Rewrites 16-bit audio in the format of dst's extension (WAV or FLAC), sample for sample, and
+    checks the result decodes to the same samples. Returns (src bytes, dst bytes).
+    """
+    import soundfile as sf
+    info = sf.info(src)
+    if info.subtype != "PCM_16":
+        raise ValueError(f"{src} is {info.subtype}, not 16-bit PCM")
+    x, sr = sf.read(src, dtype="int16", always_2d=True)
+    sf.write(dst, x, sr, subtype="PCM_16")
+    if not np.array_equal(sf.read(dst, dtype="int16", always_2d=True)[0], x):
+        os.remove(dst)
+        raise RuntimeError(f"{dst} does not decode to the samples of {src}")
+    return os.path.getsize(src), os.path.getsize(dst)
+
+
+class SessionStream:
+    """
+    Appends recordings to one preallocated, memory-mapped mono WAV (int16 or float32 samples) and
+    indexes them in a CSV next to it: name (the per-take WAV it stands in for), trial, attempt, the
+    recording's span in the stream and the trimmed take's span. write() is a copy into the page
+    cache; the header is patched and the unused tail cut off on close(). If a session dies, the
+    index still locates every take written (it is fsynced every fsync_every rows), and the file
+    reads as a WAV padded with silence. Grows by doubling if capacity_s runs out. With
+    codec="flac", close() compresses the stream to a FLAC next to it (`path` then points there).
+    """
+
+    def __init__(self, path, sr, dtype="int16", capacity_s=600.0, fsync_every=10, codec="wav"):
+        if dtype not in DTYPES:
+            raise ValueError(f"stream dtype must be one of {sorted(DTYPES)}, got {dtype!r}")
+        if codec == "flac" and dtype != "int16":
+            raise ValueError("a FLAC session stream must be int16")
+        self.path = path
+        self.codec = codec
+        self.sr = sr
+        self.dtype = dtype
+        self.n = 0
+        self._capacity = max(1, int(capacity_s * sr))
+        with open(path, "wb") as f:
+            f.write(wav_header(sr, dtype, self._capacity))
+            f.truncate(HEADER_BYTES + self._capacity * DTYPES[dtype][1].itemsize)   # sparse where supported
+        self._map()
+        self.index = SessionLogger(index_path(path), STREAM_INDEX_COLUMNS, fsync_every=fsync_every)
+
+    def _map(self):
+        self._mm = np.memmap(self.path, dtype=DTYPES[self.dtype][1], mode="r+", offset=HEADER_BYTES,
+                             shape=(self._capacity,))
+
+    def _grow(self, n_needed):
+        self._mm.flush()
+        del self._mm
+        while self._capacity < n_needed:
+            self._capacity *= 2
+        with open(self.path, "r+b") as f:
+            f.truncate(HEADER_BYTES + self._capacity * DTYPES[self.dtype][1].itemsize)
+        self._map()
+
+    def write(self, name, trial, attempt, x, start, end):
+        """Append recording x (1-D float32) whose take is x[start:end]; returns its span in the stream."""
+        a, b = self.n, self.n + len(x)
+        if b > self._capacity:
+            self._grow(b)
+        self._mm[a:b] = to_pcm16(x) if self.dtype == "int16" else x
+        self.n = b
+        self.index.log([name, trial, attempt, a, b, a + start, a + end])
+        return a, b
+
+    def close(self):
+        self.index.close()
+        self._mm.flush()
+        del self._mm
+        with open(self.path, "r+b") as f:
+            f.write(wav_header(self.sr, self.dtype, self.n))
+            f.truncate(HEADER_BYTES + self.n * DTYPES[self.dtype][1].itemsize)
+        if self.codec == "flac":
+            flac = os.path.splitext(self.path)[0] + ".flac"
+            transcode(self.path, flac)
+            os.remove(self.path)
+            self.path = flac
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class StreamReader:
+    """
+    Takes of a session stream as NumPy views of its memmap, without copying: take(i) or take(name)
+    is the trimmed take (full=True: the whole recording), in the stored sample type; multiply by
+    `scale` for float samples in [-1, 1) as soundfile would read them. `takes` is the index.
+    A FLAC stream is decoded into memory once and viewed the same way.
+    """
+
+    def __init__(self, path):
+        mm = wav_memmap(path)
+        if mm is None:
+            import soundfile as sf
+            if sf.info(path).subtype != "PCM_16":
+                raise ValueError(f"{path} is not a mono int16/float32 WAV or 16-bit FLAC")
+            x, sr = sf.read(path, dtype="int16", always_2d=True)
+            mm = x[:, 0], sr
+        self.path = path
+        self.samples, self.sr = mm
+        self.scale = 1.0 / 32768.0 if self.samples.dtype == np.int16 else 1.0
+        with open(index_path(path), newline="", encoding="utf-8") as f:
+            self.takes = [{k: v if k == "name" else int(v) for k, v in rec.items()} for rec in csv.DictReader(f)]
+        self._by_name = {t["name"]: t for t in self.takes}
+
+    def __len__(self):
+        return len(self.takes)
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def take(self, key, full=False):
+        t = self._by_name[key] if isinstance(key, str) else self.takes[key]
+        a, b = (t["start_sample"], t["end_sample"]) if full else (t["trim_start"], t["trim_end"])
+        return self.samples[a:b]
+
+    def take_float(self, key, full=False):
+        """take() as float32 in [-1, 1): still a view for a float32 stream, converted from int16 otherwise."""
+        x = self.take(key, full)
+        return x if x.dtype == np.float32 else np.multiply(x, self.scale, dtype=np.float32)
+
+
+def export(path, out_dir=None, full=False):
+    """
+    Writes every take of a stream as its own 16-bit file (the one the task would have saved, WAV or
+    FLAC by the name in the index); returns the paths.
+    """
+    import soundfile as sf
+    reader = StreamReader(path)
+    out_dir = out_dir or os.path.dirname(path)
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for i, t in enumerate(reader.takes):
+        out = os.path.join(out_dir, t["name"])
+        sf.write(out, to_pcm16(reader.take(i, full)), reader.sr, subtype="PCM_16")
+        paths.append(out)
+    return paths
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Export the takes of session streams as per-take files.")
+    parser.add_argument("streams", nargs="+", help="stream WAVs/FLACs (their index CSV is read from next to them)")
+    parser.add_argument("--out", help="output directory (default: next to each stream)")
+    parser.add_argument("--full", action="store_true", help="whole recordings instead of the trimmed takes")
+    args = parser.parse_args()
+
+    for path in args.streams:
+        if not os.path.exists(index_path(path)):
+            sys.exit(f"No index for {path} (expected {index_path(path)})")
+        paths = export(path, args.out, args.full)
+        print(f"{path}: {len(paths)} takes -> {args.out or os.path.dirname(path) or '.'}")
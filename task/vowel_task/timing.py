@@ -0,0 +1,107 @@
+"""Per-attempt latency instrumentation for the trial loop."""
+
+import sys, time, math, statistics, tracemalloc
+from collections import defaultdict
+
+# attempt phases, in the order they happen
+PHASES = (
+    "prompt_flip",     # word prompt on screen
+    "keypress",        # SPACE pressed
+    "dot_flip",        # red dot on screen
+    "stream_start",    # input stream being opened
+    "first_block",     # first audio block arrived (audio thread)
+    "rec_end",         # stream closed
+    "vad_done",        # trim + active stats computed
+    "wav_queued",      # take handed to the writer thread
+    "log",             # attempt row written
+)
+TIMING_COLUMNS = [f"t_{p}" for p in PHASES] + ["input_latency_s"]
+
+
+class AttemptTimer:
+    """
+    High-resolution (perf_counter) timestamps for the phases of every attempt, logged as seconds
+    since the session started, plus durations of background work (e.g. WAV writes) that don't
+    belong to one row. summary() prints percentiles and jitter of the interval between
+    consecutive phases over the whole session.
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.attempts = []                 # dicts of phase -> perf_counter time
+        self.durations = defaultdict(list)
+        self._current = {}
+        self._latency = math.nan
+
+    def start(self):
+        self._current = {}
+        self._latency = math.nan
+        self.attempts.append(self._current)
+
+    def mark(self, phase, t=None):
+        self._current[phase] = time.perf_counter() if t is None else t
+
+    def set_input_latency(self, seconds):
+        self._latency = seconds
+
+    def add_duration(self, name, seconds):
+        self.durations[name].append(seconds)
+
+    def columns(self):
+        """Values for TIMING_COLUMNS for the current attempt (empty where a phase was not reached)."""
+        t = self._current
+        row = [f"{t[p] - self.t0:.6f}" if p in t else "" for p in PHASES]
+        return row + ["" if math.isnan(self._latency) else f"{self._latency:.6f}"]
+
+    def intervals(self):
+        """{'a -> b': list of seconds} between consecutive phases, over attempts that reached both."""
+        out = {}
+        for a, b in zip(PHASES, PHASES[1:]):
+            out[f"{a} -> {b}"] = [t[b] - t[a] for t in self.attempts if a in t and b in t]
+        out.update(self.durations)
+        return out
+
+    def summary(self, file=None):
+        file = file or sys.stdout
+        print(f"Timing over {len(self.attempts)} attempts (ms):", file=file)
+        print(f"  {'interval':<28} {'n':>5} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8} {'jitter':>8}", file=file)
+        for name, d in self.intervals().items():
+            if not d:
+                continue
+            q = statistics.quantiles(d, n=100, method="inclusive") if len(d) > 1 else d * 99
+            # jitter: standard deviation of the interval
+            ms = [v * 1000 for v in (q[49], q[89], q[98], max(d), statistics.pstdev(d))]
+            print(f"  {name:<28} {len(d):5d}" + "".join(f" {v:8.2f}" for v in ms), file=file)
+
+
+class AllocCounter:
+    """
+    Debug: Python/NumPy memory allocated during each attempt, on any thread (tracemalloc), as the
+    peak above what was live when the attempt started and what was still held at its end.
+    Slows allocation down a little, so it is off unless TaskConfig.debug_alloc is set.
+    """
+
+    def __init__(self):
+        tracemalloc.start()
+        self.peak = []
+        self.net = []
+        self._base = 0
+
+    def start(self):
+        self._base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+    def stop(self):
+        current, peak = tracemalloc.get_traced_memory()
+        self.peak.append(peak - self._base)
+        self.net.append(current - self._base)
+        print(f"alloc: peak +{self.peak[-1] / 1024:.1f} KiB, held +{self.net[-1] / 1024:.1f} KiB")
+
+    def summary(self, file=None):
+        if self.peak:
+            print(f"Allocation over {len(self.peak)} attempts: peak median "
+                  f"{statistics.median(self.peak) / 1024:.1f} KiB, max {max(self.peak) / 1024:.1f} KiB; "
+                  f"held median {statistics.median(self.net) / 1024:.1f} KiB", file=file or sys.stdout)
+
+    def close(self):
+        tracemalloc.stop()
@@ -0,0 +1,242 @@
+"""Energy VAD and take statistics. NumPy only, so the analysis scripts can import it too."""
+
+import numpy as np
+
+
+def rms(sig):
+    if len(sig) == 0:
+        return 0.0
+    return float(np.sqrt(np.mean(np.square(sig), dtype=np.float64)))
+
+
+def frame_rms(x, frame_len, scratch=None):
+    """
+    RMS of each non-overlapping frame of x, framed as a strided view (no copy). The squared frames
+    go into `scratch` (a 1-D array of x's dtype) when it is given and large enough.
+    """
+    x = np.asarray(x)
+    n_frames = (len(x) - frame_len) // frame_len + 1 if len(x) >= frame_len else 0
+    step = x.strides[0]
+    frames = np.lib.stride_tricks.as_strided(
+        x, shape=(n_frames, frame_len), strides=(frame_len * step, step), writeable=False)
+    if scratch is not None and scratch.dtype == x.dtype and scratch.size >= frames.size:
+        sq = np.square(frames, out=scratch[:frames.size].reshape(frames.shape))
+    else:
+        sq = np.square(frames)
+    return np.sqrt(sq.mean(axis=1))
+
+
+def segments_from_frames(frms, n, frame_len, hang_frames, z=0.5, abs_floor=0.01):
+    """Threshold frame RMS and turn active runs (plus hangover) into (start_idx, end_idx) samples."""
+    if len(frms) == 0:
+        return []
+    thr = max(frms.mean() + z * (frms.std() + 1e-9), abs_floor)
+    act = np.flatnonzero(frms >= thr)
+    if act.size == 0:
+        return []
+    # a segment closes once a run of inactive frames outlasts the hangover
+    gaps = np.diff(act) - 1
+    brk = np.flatnonzero(gaps > hang_frames)
+    first = act[np.r_[0, brk + 1]]
+    last = act[np.r_[brk, act.size - 1]]
+    starts = first * frame_len
+    ends = np.minimum((last + hang_frames + 2) * frame_len, n)
+    # still in hangover when the frames run out -> runs to the end of the signal
+    if last[-1] + hang_frames + 1 >= len(frms):
+        ends[-1] = n
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def detect_active_segments(x, sr, frame_ms=10, hangover_ms=50, z=0.5, abs_floor=0.01):
+    """Return list of (start_idx, end_idx) samples judged 'active' via simple energy VAD."""
+    frame_len = max(1, int(sr * frame_ms / 1000.0))  # non-overlapping frames (hop = frame_len)
+    hang_frames = max(1, int(hangover_ms / frame_ms))
+    frms = frame_rms(x, frame_len)
+    return segments_from_frames(frms, len(x), frame_len, hang_frames, z, abs_floor)
+
+
+def segment_stats(x, frms, segs, frame_len, sr):
+    """
+    (active_duration_s, active_rms) of segs in x, from the frame sums of squares (frms**2 * frame_len)
+    plus the samples after the last full frame, without copying the active samples out.
+    """
+    if not segs:
+        return 0.0, 0.0
+    s, e = np.array(segs).T
+    total = int((e - s).sum())
+    full = len(frms) * frame_len
+    energy = np.concatenate([[0.0], np.cumsum(np.square(frms, dtype=np.float64))]) * frame_len
+    # starts are on frame boundaries; so are ends, except one that runs into the partial last frame
+    act = (energy[np.minimum(e, full) // frame_len] - energy[s // frame_len]).sum()
+    if e[-1] > full:
+        act += np.square(x[full:e[-1]], dtype=np.float64).sum()
+    return total / sr, float(np.sqrt(act / total))
+
+
+def active_stats(x, sr, frame_ms=10, hangover_ms=50, z=0.5, abs_floor=0.01):
+    """Total duration (s) and RMS of the active segments of x."""
+    frame_len = max(1, int(sr * frame_ms / 1000.0))
+    hang_frames = max(1, int(hangover_ms / frame_ms))
+    frms = frame_rms(x, frame_len)
+    segs = segments_from_frames(frms, len(x), frame_len, hang_frames, z, abs_floor)
+    return segment_stats(x, frms, segs, frame_len, sr)
+
+
+def analyze_take(x, sr, frame_ms=10, hangover_ms=50, z=0.5, abs_floor=0.01, pad_s=0.02, frms=None):
+    """
+    Trim and score a take in one pass over its frame energies: returns (start, end, active_duration_s,
+    active_rms), where x[start:end] spans the first to the last active segment plus pad_s pre/post-roll
+    (all of x if nothing is active), and the stats are active_stats(x[start:end]) with the same
+    parameters. The trimmed span's frames are reused from the whole take when they line up, so the
+    audio is framed once. Pass frms (e.g. from a StreamingVAD) if the take has been framed already.
+    """
+    frame_len = max(1, int(sr * frame_ms / 1000.0))
+    hang_frames = max(1, int(hangover_ms / frame_ms))
+    if frms is None:
+        frms = frame_rms(x, frame_len)
+    segs = segments_from_frames(frms, len(x), frame_len, hang_frames, z, abs_floor)
+    start, end = 0, len(x)
+    if segs:
+        start = max(0, segs[0][0] - int(pad_s * sr))
+        end = min(len(x), segs[-1][1] + int(pad_s * sr))
+    x_trim = x[start:end]
+    if start % frame_len == 0:
+        f0 = start // frame_len
+        frms = frms[f0:f0 + len(x_trim) // frame_len]
+    else:
+        frms = frame_rms(x_trim, frame_len)
+    segs = segments_from_frames(frms, len(x_trim), frame_len, hang_frames, z, abs_floor)
+    return (start, end) + segment_stats(x_trim, frms, segs, frame_len, sr)
+
+
+def judge_take(x_trim, sr, min_dur, min_rms, **vad_params):
+    """The task's pass/fail rule on an already trimmed take: (active_duration_s, active_rms, passed)."""
+    act_dur_s, act_rms = active_stats(x_trim, sr, **vad_params)
+    return act_dur_s, act_rms, (act_dur_s >= min_dur) and (act_rms >= min_rms)
+
+
+class StreamingVAD:
+    """
+    Block-by-block energy VAD with the same framing, threshold and hangover rules as detect_active_segments.
+
+    process() emits ('open', start_idx) / ('close', end_idx) events as they happen, thresholding each
+    frame against running mean/std of frame RMS. finalize() re-thresholds with whole-signal statistics
+    and returns exactly what detect_active_segments returns for the concatenated blocks. No samples are
+    kept: state is O(1) apart from one frame-RMS value per frame for finalize().
+    """
+
+    def __init__(self, sr, frame_ms=10, hangover_ms=50, z=0.5, abs_floor=0.01):
+        self.sr = sr
+        self.frame_ms = frame_ms
+        self.hangover_ms = hangover_ms
+        self.frame_len = max(1, int(sr * frame_ms / 1000.0))
+        self.hang_frames = max(1, int(hangover_ms / frame_ms))
+        self.z = z
+        self.abs_floor = abs_floor
+        self.n_samples = 0
+        self.n_frames = 0
+        self._rest = None     # partial frame carried over to the next block
+        self._scratch = None  # squared frames of a block, reused
+        self._frms = []       # frame RMS per block, for finalize()
+        self._sum = 0.0       # running frame-RMS sums for the live threshold
+        self._sumsq = 0.0
+        self._on = None       # first frame of the open segment
+        self._last = None     # last active frame
+        self._longest = 0     # frames in the longest segment so far
+
+    @property
+    def in_segment(self):
+        return self._on is not None
+
+    @property
+    def speech_seen(self):
+        return self._last is not None
+
+    @property
+    def trailing_silence_s(self):
+        """Time since the last active frame (0 while active, or before any speech)."""
+        if self._last is None:
+            return 0.0
+        return (self.n_frames - 1 - self._last) * self.frame_len / self.sr
+
+    @property
+    def longest_active_s(self):
+        """Length of the longest segment so far (first to last active frame, gaps within the hangover bridged)."""
+        return self._longest * self.frame_len / self.sr
+
+    def process(self, block):
+        """Consume a 1-D block of samples and return the list of segment events it triggered."""
+        block = np.asarray(block)
+        self.n_samples += len(block)
+        fl = self.frame_len
+        head = None
+        if self._rest is not None and len(self._rest):
+            # complete the frame carried over from the last block; only that frame is copied
+            need = fl - len(self._rest)
+            if len(block) < need:
+                self._rest = np.concatenate([self._rest, block])
+                return []
+            head = frame_rms(np.concatenate([self._rest, block[:need]]), fl)
+            block = block[need:]
+        if self._scratch is None or self._scratch.dtype != block.dtype or self._scratch.size < len(block):
+            self._scratch = np.empty(len(block), dtype=block.dtype)
+        frms = frame_rms(block, fl, self._scratch)
+        if head is not None:
+            frms = np.concatenate([head, frms])
+        self._rest = np.array(block[(len(block) // fl) * fl:])
+        k = len(frms)
+        if k == 0:
+            return []
+        self._frms.append(frms)
+        base = self.n_frames
+        self.n_frames += k
+
+        # running threshold, one value per frame
+        f = frms.astype(np.float64)
+        cnt = np.arange(base + 1, base + k + 1)
+        mean = (self._sum + np.cumsum(f)) / cnt
+        var = np.maximum((self._sumsq + np.cumsum(f * f)) / cnt - mean * mean, 0.0)
+        self._sum += float(f.sum())
+        self._sumsq += float((f * f).sum())
+        thr = np.maximum(mean + self.z * (np.sqrt(var) + 1e-9), self.abs_floor)
+
+        events = []
+        idx = np.flatnonzero(frms >= thr) + base
+        if idx.size:
+            if self._on is not None and idx[0] - self._last - 1 > self.hang_frames:
+                events.append(self._close())
+            gaps = np.diff(idx) - 1
+            brk = np.flatnonzero(gaps > self.hang_frames)
+            firsts = idx[np.r_[0, brk + 1]].tolist()
+            lasts = idx[np.r_[brk, idx.size - 1]].tolist()
+            for i, (first, last) in enumerate(zip(firsts, lasts)):
+                if self._on is None:
+                    self._on = first
+                    events.append(("open", first * self.frame_len))
+                self._last = last
+                self._longest = max(self._longest, last - self._on + 1)
+                if i < len(firsts) - 1:
+                    events.append(self._close())
+        if self._on is not None and self.n_frames - 1 - self._last > self.hang_frames:
+            events.append(self._close())
+        return events
+
+    def _close(self):
+        self._on = None
+        return ("close", (self._last + self.hang_frames + 2) * self.frame_len)
+
+    def all_frame_rms(self):
+        """Frame RMS of everything processed so far (what frame_rms gives for the whole signal)."""
+        return np.concatenate(self._frms) if self._frms else np.zeros(0, dtype=np.float32)
+
+    def finalize(self):
+        """Segments for everything processed so far, identical to detect_active_segments on the same audio."""
+        if not self._frms:
+            return []
+        return segments_from_frames(self.all_frame_rms(), self.n_samples, self.frame_len, self.hang_frames,
+                                    self.z, self.abs_floor)
+
+    def analyze(self, x, pad_s=0.02):
+        """analyze_take on the processed audio x, reusing the frame energies computed while streaming."""
+        return analyze_take(x, self.sr, self.frame_ms, self.hangover_ms, self.z,
+                            self.abs_floor, pad_s, frms=self.all_frame_rms())